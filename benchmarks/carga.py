@@ -0,0 +1,340 @@
+"""Teste de carga do painel com sessões simultâneas, sem navegador nem rede.
+
+Gera um conjunto sintético (``sinteticos.gerar``), grava-o como snapshot
+Parquet e dirige ``dashboard_melhorados.py`` pelo ``AppTest`` do Streamlit:
+cada sessão repete interações aleatórias da barra lateral (modo e seleção de
+anos, senioridades, tamanhos de empresa, faixa de salário, Aplicar no modo em
+lote, seção de gráficos e tabela), com uma pausa de "reflexão" exponencial
+entre elas, e cada rerun é cronometrado.
+
+O ``AppTest`` mantém o runtime do Streamlit num global do processo e não
+aceita dois reruns ao mesmo tempo no mesmo processo. Por isso as sessões são
+repartidas entre ``--processos`` processos (cada um com seus próprios caches,
+como réplicas do servidor): dentro de um processo, as sessões são threads que
+alternam os reruns sob uma trava, e o tempo parado nessa fila é medido à
+parte (``espera``). Entre processos, os reruns correm de fato em paralelo.
+
+Limites (repetidos no relatório, em ``LIMITACOES``): nenhum rerun disputa
+CPU, GIL ou locks com outra sessão do mesmo processo, que é o caso de um
+servidor Streamlit real; e o ``AppTest`` reexecuta o script inteiro mesmo
+para widgets dentro de fragmentos, então as latências do modo em lote são
+pessimistas (no servidor, editar a barra lateral reexecuta só o fragmento).
+
+Relata a latência do primeiro rerun de cada sessão (carga e caches frios) e
+p50/p95/p99 dos reruns seguintes, a vazão (reruns por segundo no intervalo em
+que as sessões estavam ativas) e a memória de cada processo (RSS atual e
+pico, e a parte anônima e a mapeada de arquivos).
+
+Uso (a partir da raiz do repositório)::
+
+    python -m benchmarks.carga --linhas 100k --sessoes 8 --processos 2 --interacoes 30
+    python -m benchmarks.carga --linhas 1M --sessoes 4 --modo ao_vivo --saida carga.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from streamlit.testing.v1 import AppTest
+
+from .executar import _tamanho
+from .sinteticos import gerar
+
+PAINEL = Path(__file__).resolve().parent.parent / "dashboard_melhorados.py"
+
+PERCENTIS = (50, 95, 99)
+
+# O que o teste não mede; impresso no relatório e gravado no JSON
+LIMITACOES = [
+    "sessões do mesmo processo não rodam reruns ao mesmo tempo (trava do AppTest): "
+    "a disputa entre sessões de um mesmo servidor não é medida; use --processos para paralelismo",
+    "o AppTest reexecuta o script inteiro também em widgets de fragmentos: no modo em lote, "
+    "as edições da barra lateral custam aqui um rerun completo, e no servidor só o fragmento",
+]
+
+
+# --- Interações da barra lateral ---
+
+def _widget(lista, rotulo=None, chave=None):
+    """Primeiro widget com o rótulo ou a chave dados, ou None se não estiver na tela"""
+    for widget in lista:
+        if (rotulo is not None and widget.label == rotulo) or (chave is not None and widget.key == chave):
+            return widget
+    return None
+
+
+def _subconjunto(rng, opcoes):
+    """Subconjunto aleatório e não vazio das opções"""
+    return rng.sample(opcoes, rng.randint(1, len(opcoes)))
+
+
+def _modo_com_lista(at, rng, chave_radio, rotulo_lista):
+    """Troca o modo de um radio ou, se a lista já está na tela, sorteia os valores"""
+    lista = _widget(at.multiselect, rotulo_lista)
+    if lista is not None and rng.random() < 0.7:
+        lista.set_value(_subconjunto(rng, lista.options))
+        return
+    radio = _widget(at.radio, chave=chave_radio)
+    radio.set_value(rng.choice(radio.options))
+
+
+def _anos(at, rng):
+    _modo_com_lista(at, rng, "modo_ano", "Escolha os anos")
+
+
+def _tamanhos(at, rng):
+    _modo_com_lista(at, rng, "modo_tamanho", "Escolha os tamanhos")
+
+
+def _senioridades(at, rng):
+    lista = _widget(at.multiselect, "Níveis de experiência")
+    if lista is not None and rng.random() < 0.7:
+        lista.set_value(_subconjunto(rng, lista.options))
+    else:
+        caixa = _widget(at.checkbox, chave="todos_senioridade")
+        caixa.set_value(not caixa.value)
+
+
+def _salario(at, rng):
+    faixa = _widget(at.slider, "Selecione a faixa:")
+    if faixa is None or rng.random() < 0.2:
+        caixa = _widget(at.checkbox, "Ativar filtro de salário")
+        caixa.set_value(not caixa.value)
+        return
+    passos = int((faixa.max - faixa.min) // faixa.step)
+    inicio, fim = sorted(rng.sample(range(passos + 1), 2))
+    faixa.set_value((faixa.min + inicio * faixa.step, faixa.min + fim * faixa.step))
+
+
+def _aplicar(at, rng):
+    _widget(at.button, "📊 Aplicar").click()
+
+
+def _secao(at, rng):
+    radio = _widget(at.radio, chave="secao_graficos")
+    radio.set_value(rng.choice(radio.options))
+
+
+def _tabela(at, rng):
+    caixa = _widget(at.checkbox, "Mostrar tabela de dados completa")
+    caixa.set_value(not caixa.value)
+
+
+# Ação -> (função, peso no sorteio); "aplicar" só no modo em lote
+INTERACOES = {
+    "anos": (_anos, 3),
+    "senioridades": (_senioridades, 3),
+    "tamanhos": (_tamanhos, 2),
+    "salario": (_salario, 2),
+    "aplicar": (_aplicar, 4),
+    "secao": (_secao, 2),
+    "tabela": (_tabela, 1),
+}
+
+
+def _sortear(rng, modo):
+    nomes = [nome for nome in INTERACOES if modo == "lote" or nome != "aplicar"]
+    return rng.choices(nomes, weights=[INTERACOES[nome][1] for nome in nomes])[0]
+
+
+# --- Sessões e processos ---
+
+def _memoria():
+    """RSS atual e de pico do processo, em bytes (Linux: /proc/self/status)"""
+    campos = {"VmRSS": "rss", "VmHWM": "rss_pico", "RssAnon": "rss_anonimo", "RssFile": "rss_arquivos"}
+    memoria = {}
+    try:
+        with open("/proc/self/status") as arquivo:
+            for linha in arquivo:
+                nome, _, valor = linha.partition(":")
+                if nome in campos:
+                    memoria[campos[nome]] = int(valor.split()[0]) * 1024
+    except OSError:
+        import resource
+        memoria["rss_pico"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return memoria
+
+
+def _sessao(indice, args, trava, registros):
+    """Uma sessão: primeiro rerun e ``interacoes`` interações aleatórias"""
+    rng = random.Random(args.semente + indice)
+    at = AppTest.from_file(str(PAINEL), default_timeout=args.timeout)
+    for passo in range(args.interacoes + 1):
+        acao = "inicial"
+        if passo:
+            time.sleep(rng.expovariate(1 / args.pausa) if args.pausa > 0 else 0)
+            acao = _sortear(rng, args.modo)
+            try:
+                INTERACOES[acao][0](at, rng)
+            except (AttributeError, IndexError, ValueError):
+                # Widget fora da tela neste estado (ex.: rerun anterior falhou)
+                acao = "rerun"
+
+        pedido = time.perf_counter()
+        with trava:
+            inicio_parede = time.time()
+            inicio = time.perf_counter()
+            at.run()
+            duracao = time.perf_counter() - inicio
+        registros.append({
+            "sessao": indice,
+            "acao": acao,
+            "inicio": inicio_parede,
+            "fim": inicio_parede + duracao,
+            "espera_s": inicio - pedido,
+            "duracao_s": duracao,
+            "erros": len(at.exception),
+        })
+
+
+def _processo(indices, args):
+    """Roda as sessões ``indices`` como threads deste processo"""
+    os.environ["DASHBOARD_SNAPSHOT"] = args.snapshot
+    os.environ["DASHBOARD_MODO_FILTROS"] = args.modo
+    # Sem verificação periódica da fonte: o teste não toca a rede
+    os.environ.setdefault("DASHBOARD_ATUALIZACAO_S", "0")
+    # Threads de sessão não têm ScriptRunContext fora do rerun: aviso esperado
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    trava = threading.Lock()
+    registros = []
+    threads = [
+        threading.Thread(target=_sessao, args=(indice, args, trava, registros), name=f"sessao-{indice}")
+        for indice in indices
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"pid": os.getpid(), "sessoes": list(indices), "memoria": _memoria(), "registros": registros}
+
+
+# --- Resumo ---
+
+def _percentis(valores):
+    if not valores:
+        return {}
+    resumo = {f"p{p}_s": float(np.percentile(valores, p)) for p in PERCENTIS}
+    resumo["max_s"] = float(np.max(valores))
+    resumo["n"] = len(valores)
+    return resumo
+
+
+def resumir(processos):
+    """Latências, vazão e memória a partir dos registros de todos os processos"""
+    registros = [registro for processo in processos for registro in processo["registros"]]
+    primeiros = [r for r in registros if r["acao"] == "inicial"]
+    seguintes = [r for r in registros if r["acao"] != "inicial"]
+
+    por_acao = {}
+    for registro in seguintes:
+        por_acao.setdefault(registro["acao"], []).append(registro["duracao_s"])
+
+    intervalo = max(r["fim"] for r in registros) - min(r["inicio"] for r in registros)
+    return {
+        "primeiro_rerun": _percentis([r["duracao_s"] for r in primeiros]),
+        "reruns": _percentis([r["duracao_s"] for r in seguintes]),
+        "espera": _percentis([r["espera_s"] for r in seguintes]),
+        "por_acao": {acao: _percentis(duracoes) for acao, duracoes in sorted(por_acao.items())},
+        "vazao_reruns_s": len(registros) / intervalo if intervalo > 0 else None,
+        "intervalo_s": intervalo,
+        "reruns_com_erro": sum(1 for r in registros if r["erros"]),
+        "memoria": {str(processo["pid"]): processo["memoria"] for processo in processos},
+        "limitacoes": LIMITACOES,
+    }
+
+
+def _linha(nome, medida):
+    if not medida:
+        return
+    print(
+        f"{nome:<18}{medida['n']:>6}"
+        + "".join(f"{medida[f'p{p}_s'] * 1000:>11,.1f}" for p in PERCENTIS)
+        + f"{medida['max_s'] * 1000:>11,.1f}"
+    )
+
+
+def _imprimir(resumo):
+    print(f"\n{'latência (ms)':<18}{'n':>6}" + "".join(f"{f'p{p}':>11}" for p in PERCENTIS) + f"{'máx':>11}")
+    _linha("primeiro rerun", resumo["primeiro_rerun"])
+    _linha("reruns", resumo["reruns"])
+    _linha("espera na fila", resumo["espera"])
+    for acao, medida in resumo["por_acao"].items():
+        _linha(f"  {acao}", medida)
+
+    print(f"\nvazão: {resumo['vazao_reruns_s']:,.2f} reruns/s em {resumo['intervalo_s']:,.1f} s")
+    if resumo["reruns_com_erro"]:
+        print(f"reruns com exceção no script: {resumo['reruns_com_erro']}")
+
+    print(f"\n{'processo':<10}{'RSS (MB)':>12}{'pico (MB)':>12}{'anônima (MB)':>14}{'arquivos (MB)':>15}")
+    for pid, memoria in resumo["memoria"].items():
+        valores = [memoria.get(campo) for campo in ("rss", "rss_pico", "rss_anonimo", "rss_arquivos")]
+        print(f"{pid:<10}" + "".join(
+            f"{'-' if valor is None else f'{valor / 1024 ** 2:,.1f}':>{largura}}"
+            for valor, largura in zip(valores, (12, 12, 14, 15))
+        ))
+
+    print("\nlimitações:")
+    for limitacao in resumo["limitacoes"]:
+        print(f"- {limitacao}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", default="100k", help="tamanho do conjunto sintético (ex.: 10k, 1M)")
+    parser.add_argument("--sessoes", type=int, default=4, help="sessões simultâneas")
+    parser.add_argument("--processos", type=int, help="processos do painel (padrão: um por CPU, até --sessoes)")
+    parser.add_argument("--interacoes", type=int, default=20, help="interações por sessão")
+    parser.add_argument("--pausa", type=float, default=0.5, help="pausa média entre interações, em segundos")
+    parser.add_argument("--modo", choices=["lote", "ao_vivo"], default="lote", help="modo de aplicação dos filtros")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="limite por rerun, em segundos")
+    parser.add_argument("--saida", type=Path, help="grava o resumo e os registros em JSON")
+    args = parser.parse_args(argv)
+
+    n_linhas = _tamanho(args.linhas)
+    n_processos = max(1, min(args.processos or os.cpu_count() or 1, args.sessoes))
+    print(f"{n_linhas:,} linhas, {args.sessoes} sessões em {n_processos} processos, "
+          f"{args.interacoes} interações por sessão (modo {args.modo})")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = Path(diretorio) / "salarios.parquet"
+        pq.write_table(pa.Table.from_pandas(gerar(n_linhas, args.semente), preserve_index=False), caminho, compression="zstd")
+        args.snapshot = str(caminho)
+
+        # spawn: processos limpos, sem herdar o estado do Streamlit deste
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(n_processos, mp_context=contexto) as executor:
+            futuros = [
+                executor.submit(_processo, list(range(i, args.sessoes, n_processos)), args)
+                for i in range(n_processos)
+            ]
+            processos = [futuro.result() for futuro in futuros]
+
+    resumo = resumir(processos)
+    _imprimir(resumo)
+
+    if args.saida:
+        args.saida.write_text(json.dumps({
+            "ambiente": {"python": platform.python_version(), "maquina": platform.machine(), "cpus": os.cpu_count()},
+            "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "snapshot")},
+            "resumo": resumo,
+            "processos": processos,
+        }, indent=2))
+    return 1 if resumo["reruns_com_erro"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Benchmark das etapas do núcleo de dados em conjuntos sintéticos.
+
+Para cada tamanho, gera um conjunto (``sinteticos.gerar``), grava-o como
+snapshot Parquet e mede, por etapa, a latência (mediana e p95 de
+``--repeticoes`` execuções) e o pico de memória alocada (``tracemalloc``,
+em uma execução separada, para não distorcer o tempo). Cada etapa roda uma
+vez sem medição antes das repetições. Consultas rodam com o cache de agregados
+vazio, exceto ``consulta_em_cache``, que a execução inicial deixa em cache e
+mede só acertos.
+
+Uso (a partir da raiz do repositório)::
+
+    python -m benchmarks.executar --tamanhos 10k 100k 1M --saida resultados.json
+    python -m benchmarks.executar --tamanhos 10k 100k 1M --referencia resultados.json
+
+Com ``--referencia``, sai com código 1 se alguma etapa ficar mais lenta que a
+referência além de ``--tolerancia``. O pico do ``tracemalloc`` cobre as
+alocações do Python e do NumPy; buffers internos do Arrow (etapa ``carga``)
+não entram.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dados_salarios import fonte
+from dados_salarios.conjunto import preparar_conjunto
+
+from .sinteticos import ANOS, SENIORIDADES, TAMANHOS, gerar
+
+TAMANHOS_PADRAO = ["10k", "100k", "1M", "10M", "50M"]
+
+# Recorte típico da barra lateral e faixa de salário usada nas etapas com filtro
+FAIXA_SALARIO = (60_000, 150_000)
+
+# Diferença mínima para contar como regressão (evita ruído em etapas de microssegundos)
+FOLGA_REGRESSAO_S = 0.001
+
+
+def _tamanho(texto):
+    """Converte "10k", "1M" etc. em número de linhas"""
+    multiplicadores = {"k": 1_000, "m": 1_000_000}
+    sufixo = texto[-1].lower()
+    if sufixo in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[sufixo])
+    return int(texto)
+
+
+def _selecoes(conjunto):
+    return {
+        "ano": ANOS[-2:],
+        "senioridade": SENIORIDADES[1:3],
+        "contrato": conjunto.opcoes("contrato"),
+        "tamanho_empresa": TAMANHOS[:2],
+    }
+
+
+def _estagios(conjunto):
+    """Etapas medidas sobre um conjunto já preparado: nome -> função sem argumentos"""
+    selecoes = _selecoes(conjunto)
+    linhas = conjunto.selecionar_linhas(selecoes)
+    linhas_faixa = conjunto.selecionar_linhas(selecoes, FAIXA_SALARIO)
+
+    def sem_cache(funcao):
+        def executar():
+            conjunto.cache.limpar()
+            return funcao()
+        return executar
+
+    return {
+        "filtro": lambda: conjunto.selecionar_linhas(selecoes),
+        "filtro_salario": lambda: conjunto.selecionar_linhas(selecoes, FAIXA_SALARIO),
+        "agregacao_cubo": lambda: conjunto.agregar(linhas, selecoes),
+        "agregacao_linhas": lambda: conjunto.agregar(linhas_faixa, selecoes, FAIXA_SALARIO),
+        "consulta_sem_faixa": sem_cache(lambda: conjunto.consultar(selecoes)),
+        "consulta_com_faixa": sem_cache(lambda: conjunto.consultar(selecoes, FAIXA_SALARIO)),
+        "consulta_em_cache": lambda: conjunto.consultar(selecoes),
+        "facetas": sem_cache(lambda: conjunto.facetas(selecoes)),
+        "mapa": sem_cache(lambda: conjunto.consultar_mapa("Data Scientist", selecoes, FAIXA_SALARIO)),
+        "pagina_ordenada": lambda: conjunto.pagina(linhas_faixa, 0, 100, "usd", False),
+    }
+
+
+def _tempos(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def _pico(funcao):
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _resumo(tempos, pico):
+    return {
+        "mediana_s": float(np.median(tempos)),
+        "p95_s": float(np.percentile(tempos, 95)),
+        "execucoes": len(tempos),
+        "pico_bytes": pico,
+    }
+
+
+def medir(n_linhas, repeticoes, repeticoes_carga=1, medir_memoria=True):
+    """Mede todas as etapas para um conjunto sintético de ``n_linhas``"""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = Path(diretorio) / "salarios.parquet"
+        pq.write_table(pa.Table.from_pandas(gerar(n_linhas), preserve_index=False), caminho, compression="zstd")
+        os.environ["DASHBOARD_SNAPSHOT"] = str(caminho)
+
+        # Carga e preparo dominam o tempo nos tamanhos grandes: repetições à parte
+        df = fonte.carregar_dados()
+        resultados["carga"] = _resumo(
+            _tempos(fonte.carregar_dados, repeticoes_carga),
+            _pico(fonte.carregar_dados) if medir_memoria else None,
+        )
+        conjunto = preparar_conjunto(df)
+        resultados["preparo"] = _resumo(
+            _tempos(lambda: preparar_conjunto(df), repeticoes_carga),
+            _pico(lambda: preparar_conjunto(df)) if medir_memoria else None,
+        )
+        del df
+
+    for nome, funcao in _estagios(conjunto).items():
+        # Execução inicial fora da medição (aquece o cache de consulta_em_cache)
+        funcao()
+        tempos = _tempos(funcao, repeticoes)
+        resultados[nome] = _resumo(tempos, _pico(funcao) if medir_memoria else None)
+    return resultados
+
+
+def _imprimir(n_linhas, resultados):
+    print(f"\n== {n_linhas:,} linhas ==")
+    print(f"{'etapa':<20}{'mediana (ms)':>14}{'p95 (ms)':>12}{'pico (MB)':>12}")
+    for nome, medida in resultados.items():
+        pico = "-" if medida["pico_bytes"] is None else f"{medida['pico_bytes'] / 1024 ** 2:,.1f}"
+        print(f"{nome:<20}{medida['mediana_s'] * 1000:>14,.2f}{medida['p95_s'] * 1000:>12,.2f}{pico:>12}")
+
+
+def regressoes(atual, referencia, tolerancia):
+    """Etapas cuja mediana piorou além da tolerância em relação à referência"""
+    encontradas = []
+    for tamanho, etapas in atual["tamanhos"].items():
+        for nome, medida in etapas.items():
+            base = referencia.get("tamanhos", {}).get(tamanho, {}).get(nome)
+            if base is None:
+                continue
+            limite = base["mediana_s"] * (1 + tolerancia)
+            if medida["mediana_s"] > limite and medida["mediana_s"] - base["mediana_s"] > FOLGA_REGRESSAO_S:
+                encontradas.append((tamanho, nome, base["mediana_s"], medida["mediana_s"]))
+    return encontradas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", nargs="+", default=TAMANHOS_PADRAO, help="ex.: 10k 100k 1M 10M 50M")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--repeticoes-carga", type=int, default=1, help="repetições de carga e preparo")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória")
+    parser.add_argument("--saida", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--referencia", type=Path, help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="piora relativa aceita (padrão: 25%%)")
+    args = parser.parse_args(argv)
+
+    atual = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "pyarrow": pa.__version__,
+            "maquina": platform.machine(),
+        },
+        "tamanhos": {},
+    }
+    for texto in args.tamanhos:
+        n_linhas = _tamanho(texto)
+        resultados = medir(
+            n_linhas, args.repeticoes, args.repeticoes_carga, medir_memoria=not args.sem_memoria
+        )
+        atual["tamanhos"][str(n_linhas)] = resultados
+        _imprimir(n_linhas, resultados)
+
+    if args.saida:
+        args.saida.write_text(json.dumps(atual, indent=2))
+
+    if args.referencia:
+        encontradas = regressoes(atual, json.loads(args.referencia.read_text()), args.tolerancia)
+        for tamanho, nome, antes, depois in encontradas:
+            print(f"REGRESSÃO {nome} ({int(tamanho):,} linhas): {antes * 1000:,.2f} ms -> {depois * 1000:,.2f} ms")
+        if encontradas:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
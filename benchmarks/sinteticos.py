@@ -0,0 +1,56 @@
+"""Gerador de conjuntos sintéticos com as mesmas colunas do CSV de salários.
+
+As colunas de texto já saem como ``category`` (códigos sorteados), para que
+tamanhos de dezenas de milhões de linhas caibam em memória; ``usd`` segue uma
+log-normal próxima da distribuição real e ``salario`` é ``usd`` convertido.
+"""
+import numpy as np
+import pandas as pd
+
+ANOS = [2020, 2021, 2022, 2023, 2024, 2025]
+SENIORIDADES = ["executivo", "junior", "pleno", "senior"]
+CONTRATOS = ["contrato", "freelancer", "integral", "parcial"]
+TAMANHOS = ["grande", "media", "pequena"]
+REMOTO = ["hibrido", "presencial", "remoto"]
+MOEDAS = ["BRL", "EUR", "GBP", "USD"]
+
+N_CARGOS = 150
+N_PAISES = 90
+
+
+def _categorica(rng, valores, n, pesos=None):
+    codigos = rng.choice(len(valores), size=n, p=pesos).astype(np.int16)
+    return pd.Categorical.from_codes(codigos, categories=valores)
+
+
+def _zipf(n_valores, expoente=1.1):
+    """Pesos de cauda longa: poucos cargos e países concentram os registros"""
+    pesos = 1.0 / np.arange(1, n_valores + 1) ** expoente
+    return pesos / pesos.sum()
+
+
+def gerar(n_linhas, semente=0):
+    """DataFrame sintético de ``n_linhas`` com as colunas de ``fonte.COLUNAS_PAINEL``"""
+    rng = np.random.default_rng(semente)
+    cargos = ["Data Scientist", "Data Engineer", "Data Analyst"] + [f"Cargo {i:03d}" for i in range(N_CARGOS - 3)]
+    paises = [f"P{i:02d}" for i in range(N_PAISES)]
+    pesos_paises = _zipf(N_PAISES)
+
+    usd = rng.lognormal(11.7, 0.5, n_linhas).round()
+    fator_moeda = np.array([5.0, 0.9, 0.8, 1.0])
+    moeda = rng.choice(len(MOEDAS), size=n_linhas, p=[0.1, 0.15, 0.1, 0.65]).astype(np.int8)
+
+    return pd.DataFrame({
+        "ano": rng.choice(ANOS, size=n_linhas).astype(np.int16),
+        "senioridade": _categorica(rng, SENIORIDADES, n_linhas, [0.1, 0.2, 0.3, 0.4]),
+        "contrato": _categorica(rng, CONTRATOS, n_linhas, [0.02, 0.02, 0.94, 0.02]),
+        "cargo": _categorica(rng, cargos, n_linhas, _zipf(N_CARGOS)),
+        "salario": (usd * fator_moeda[moeda]).astype(np.int64),
+        "moeda": pd.Categorical.from_codes(moeda, categories=MOEDAS),
+        "usd": usd.astype(np.int64),
+        "residencia": _categorica(rng, paises, n_linhas, pesos_paises),
+        "remoto": _categorica(rng, REMOTO, n_linhas),
+        "empresa": _categorica(rng, paises, n_linhas, pesos_paises),
+        "tamanho_empresa": _categorica(rng, TAMANHOS, n_linhas, [0.3, 0.5, 0.2]),
+        "residencia_iso3": _categorica(rng, paises, n_linhas, pesos_paises),
+    })
@@ -0,0 +1,14 @@
+"""Núcleo de dados do dashboard de salários (sem dependência do Streamlit).
+
+Uso sem interface (o painel Streamlit só chama estas funções)::
+
+    from dados_salarios.conjunto import carregar_conjunto
+
+    conjunto = carregar_conjunto()                     # carga + índices + cubo
+    linhas = conjunto.selecionar_linhas(selecoes, faixa_salario)   # filtro
+    resultado = conjunto.consultar(selecoes, faixa_salario)        # KPIs e agregados
+
+``selecoes`` mapeia cada dimensão de filtro (``indices.DIMENSOES_FILTRO``)
+aos valores escolhidos; ``faixa_salario`` é ``(inicio, fim)`` em USD ou None.
+Os benchmarks em ``benchmarks/`` medem cada uma dessas etapas.
+"""
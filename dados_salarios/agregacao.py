@@ -0,0 +1,384 @@
+"""Motor de agregação: todos os KPIs e entradas de gráficos em uma passada.
+
+As colunas de agrupamento são fatoradas uma única vez no carregamento. A cada
+rerun o motor recorta ``usd`` e os códigos inteiros das linhas filtradas e
+resolve todas as médias e contagens com ``np.bincount``, em vez de um
+``groupby``/``value_counts`` do pandas por gráfico. Com o cubo disponível e
+sem filtro de salário, os campos que o cubo responde vêm do rollup.
+
+O histograma de salários também é calculado aqui (contagens por faixa), para
+que o gráfico receba só as barras e não as linhas filtradas.
+
+Mediana e percentis vêm dos esboços de quantis do cubo quando ele responde
+(erro relativo documentado em ``quantis``); ``quantis_exatos=True`` força o
+cálculo exato sobre as linhas.
+
+O cargo mais frequente e os rankings top-N saem de ``argmax``/seleção parcial
+sobre as contagens exatas, sem ordenar o vocabulário inteiro.
+
+Na comparação de segmentos, ``ResultadoComparacao`` junta os resultados dos
+dois lados e um histograma contado nas mesmas faixas para ambos.
+"""
+import copy
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .frequentes import indices_top_k
+from .quantis import PERCENTIS_KPI, percentis_exatos
+
+COLUNAS_AGRUPAMENTO = ["cargo", "senioridade", "ano", "residencia_iso3", "remoto", "tamanho_empresa"]
+
+# Cargo exibido inicialmente no mapa
+CARGO_MAPA = "Data Scientist"
+
+TOP_N = 10
+
+BINS_HISTOGRAMA = 30
+
+# Percentis da faixa exibida no gráfico de evolução anual
+PERCENTIS_EVOLUCAO = (25, 50, 75)
+
+# Limites do número de faixas no modo adaptativo
+BINS_ADAPTATIVOS_MIN = 10
+BINS_ADAPTATIVOS_MAX = 120
+
+# Rótulos dos segmentos comparados (colunas das séries lado a lado)
+SEGMENTOS = ("A", "B")
+
+
+def bins_freedman_diaconis(q1, q3, n, inicio, fim):
+    """Número de faixas da regra de Freedman-Diaconis, dentro dos limites adaptativos"""
+    largura = 2 * (q3 - q1) / np.cbrt(max(n, 1))
+    bins = int(np.ceil((fim - inicio) / largura)) if largura > 0 else BINS_HISTOGRAMA
+    return min(max(bins, BINS_ADAPTATIVOS_MIN), BINS_ADAPTATIVOS_MAX)
+
+
+def bordas_histograma(usd, inicio, fim, bins=BINS_HISTOGRAMA):
+    """Bordas das faixas do histograma entre ``inicio`` e ``fim``
+
+    Com ``bins="auto"`` o número de faixas segue a regra de Freedman-Diaconis
+    sobre os valores filtrados; com um inteiro as bordas são fixas para o
+    intervalo.
+    """
+    if bins == "auto":
+        q1, q3 = np.percentile(usd, [25, 75]) if usd.size else (0.0, 0.0)
+        bins = bins_freedman_diaconis(q1, q3, usd.size, inicio, fim)
+    if fim <= inicio:
+        fim = inicio + 1
+    return np.linspace(inicio, fim, int(bins) + 1)
+
+
+def bordas_comparacao(faixas, minimo, maximo, bins=BINS_HISTOGRAMA):
+    """Bordas comuns aos histogramas dos segmentos comparados
+
+    Cobrem a união das faixas de salário (``None`` = sem filtro) dentro dos
+    limites dos dados. As faixas precisam ser as mesmas nos dois lados, então
+    ``bins="auto"`` usa o número fixo padrão.
+    """
+    inicio = min(minimo if faixa is None else max(faixa[0], minimo) for faixa in faixas)
+    fim = max(maximo if faixa is None else min(faixa[1], maximo) for faixa in faixas)
+    return bordas_histograma(np.empty(0), inicio, fim, BINS_HISTOGRAMA if bins == "auto" else bins)
+
+
+def faixas_dos_valores(usd, bordas):
+    """Índice da faixa de cada valor e máscara dos que caem dentro das bordas"""
+    posicoes = np.searchsorted(bordas, usd, side="right") - 1
+    # O último intervalo é fechado à direita, como em np.histogram
+    posicoes[usd == bordas[-1]] = len(bordas) - 2
+    return posicoes, (posicoes >= 0) & (posicoes < len(bordas) - 1)
+
+
+def calcular_histograma(usd, bordas):
+    """Contagem de valores por faixa; retorna DataFrame com inicio/fim/quantidade"""
+    posicoes, dentro = faixas_dos_valores(usd, bordas)
+    quantidade = np.bincount(posicoes[dentro], minlength=len(bordas) - 1)
+    return pd.DataFrame({
+        "inicio": bordas[:-1],
+        "fim": bordas[1:],
+        "quantidade": quantidade,
+    })
+
+
+@dataclass
+class ResultadoAgregado:
+    """KPIs e séries agregadas consumidas pelos gráficos do painel"""
+
+    total_registros: int
+    salario_medio: float
+    salario_mediano: float
+    percentis: dict
+    salario_maximo: float
+    salario_minimo: float
+    cargo_mais_frequente: str
+    top_cargos: pd.Series
+    media_por_senioridade: pd.Series
+    media_por_ano: pd.Series
+    percentis_por_ano: pd.DataFrame
+    top_paises: pd.Series
+    contagem_remoto: pd.Series
+    contagem_tamanho: pd.Series
+    histograma: pd.DataFrame
+    quantis_aproximados: bool
+
+    def evolucao_anual(self):
+        """Média e faixa de percentis por ano (entrada do gráfico de evolução)"""
+        return self.media_por_ano.to_frame().join(self.percentis_por_ano)
+
+
+@dataclass
+class ResultadoComparacao:
+    """Resultados de dois segmentos de filtros e o histograma de ambos"""
+
+    a: ResultadoAgregado
+    b: ResultadoAgregado
+    # inicio/fim das faixas comuns e uma coluna de quantidade por segmento
+    histograma: pd.DataFrame
+
+    def _lado_a_lado(self, campo):
+        return pd.concat(
+            {segmento: getattr(resultado, campo) for segmento, resultado in zip(SEGMENTOS, (self.a, self.b))},
+            axis=1,
+        )
+
+    def top_cargos(self):
+        """Salário médio dos cargos no top de cada segmento (NaN fora do top do outro)"""
+        return self._lado_a_lado("top_cargos").rename_axis("cargo")
+
+    def evolucao_anual(self):
+        """Salário médio por ano de cada segmento"""
+        return self._lado_a_lado("media_por_ano").rename_axis("ano").sort_index()
+
+
+def histograma_segmentos(bordas, quantidades):
+    """Histograma com uma coluna de quantidade por segmento, nas mesmas faixas"""
+    return pd.DataFrame({"inicio": bordas[:-1], "fim": bordas[1:], **dict(zip(SEGMENTOS, quantidades))})
+
+
+class MotorAgregacao:
+    """Códigos pré-fatorados das colunas de agrupamento e cálculo vetorizado"""
+
+    def __init__(self, df, cubo=None, colunas=COLUNAS_AGRUPAMENTO, bins_histograma=BINS_HISTOGRAMA,
+                 quantis_exatos=False):
+        self.cubo = cubo
+        self.quantis_exatos = quantis_exatos
+        self.bins_histograma = bins_histograma
+        self.usd = df["usd"].to_numpy(dtype="float64")
+        self.minimo = self.usd.min() if self.usd.size else 0.0
+        self.maximo = self.usd.max() if self.usd.size else 0.0
+        self.codigos = {}
+        self.categorias = {}
+        for coluna in colunas:
+            codigos, categorias = pd.factorize(df[coluna], sort=True)
+            # Valores ausentes (-1) vão para um balde extra, descartado no fim
+            codigos[codigos < 0] = len(categorias)
+            self.codigos[coluna] = codigos.astype(np.int32)
+            self.categorias[coluna] = pd.Index(categorias, name=coluna)
+
+    @classmethod
+    def de_codigos(cls, usd, codigos, categorias, cubo=None, bins_histograma=BINS_HISTOGRAMA,
+                   quantis_exatos=False):
+        """Motor a partir de códigos já fatorados (ex.: mapeados de um arquivo)"""
+        motor = cls.__new__(cls)
+        motor.cubo = cubo
+        motor.quantis_exatos = quantis_exatos
+        motor.bins_histograma = bins_histograma
+        motor.usd = usd
+        motor.minimo = usd.min() if usd.size else 0.0
+        motor.maximo = usd.max() if usd.size else 0.0
+        motor.codigos = codigos
+        motor.categorias = categorias
+        return motor
+
+    def anexar(self, novas, cubo=None):
+        """Novo motor com as linhas de ``novas`` acrescentadas ao fim
+
+        Só as linhas novas são fatoradas; os códigos antigos só são
+        remapeados quando surgem categorias novas na coluna.
+        """
+        novo = copy.copy(self)
+        novo.cubo = cubo if cubo is not None else self.cubo
+        usd_novas = novas["usd"].to_numpy(dtype="float64")
+        novo.usd = np.concatenate([self.usd, usd_novas])
+        if usd_novas.size:
+            novo.minimo = min(self.minimo, usd_novas.min()) if self.usd.size else usd_novas.min()
+            novo.maximo = max(self.maximo, usd_novas.max()) if self.usd.size else usd_novas.max()
+        novo.codigos = {}
+        novo.categorias = {}
+        for coluna, codigos in self.codigos.items():
+            categorias = self.categorias[coluna]
+            codigos_novas, categorias_novas = pd.factorize(novas[coluna], sort=True)
+            if not set(categorias_novas.tolist()) <= set(categorias.tolist()):
+                uniao = pd.Index(sorted(set(categorias.tolist()) | set(categorias_novas.tolist())), name=coluna)
+                # Balde de ausentes (último código) continua no fim
+                remapear = np.append(uniao.get_indexer(categorias), len(uniao)).astype(np.int32)
+                codigos = remapear[codigos]
+                categorias = uniao
+            codigos_novas = np.where(
+                codigos_novas >= 0, categorias.get_indexer(categorias_novas)[codigos_novas], len(categorias)
+            )
+            novo.codigos[coluna] = np.concatenate([codigos, codigos_novas.astype(np.int32)])
+            novo.categorias[coluna] = categorias
+        return novo
+
+    def _somas(self, coluna, codigos, usd):
+        """Contagem e soma de ``usd`` por categoria da coluna"""
+        tamanho = len(self.categorias[coluna]) + 1
+        contagem = np.bincount(codigos, minlength=tamanho)[:-1]
+        soma = np.bincount(codigos, weights=usd, minlength=tamanho)[:-1]
+        return contagem, soma
+
+    def _media(self, coluna, codigos, usd):
+        """Média de ``usd`` por categoria presente (equivale a groupby().mean())"""
+        contagem, soma = self._somas(coluna, codigos, usd)
+        presentes = contagem > 0
+        return pd.Series(
+            soma[presentes] / contagem[presentes],
+            index=self.categorias[coluna][presentes],
+            name="usd",
+        )
+
+    def _top_media(self, coluna, codigos, usd, k=TOP_N):
+        """As ``k`` maiores médias por categoria (equivale a mean().nlargest(k))"""
+        media = self._media(coluna, codigos, usd)
+        return media.iloc[indices_top_k(media.to_numpy(), k)]
+
+    def _mais_frequente(self, coluna, codigos):
+        """Categoria mais frequente (equivale a mode()[0]), ou None"""
+        contagem = np.bincount(codigos, minlength=len(self.categorias[coluna]) + 1)[:-1]
+        if not contagem.size or contagem.max() == 0:
+            return None
+        return self.categorias[coluna][int(np.argmax(contagem))]
+
+    def _contagem(self, coluna, codigos):
+        """Contagem por categoria presente (equivale a value_counts())"""
+        contagem = np.bincount(codigos, minlength=len(self.categorias[coluna]) + 1)[:-1]
+        serie = pd.Series(contagem, index=self.categorias[coluna], name="count")
+        return serie[serie > 0].sort_values(ascending=False, kind="stable")
+
+    def _percentis_por(self, coluna, codigos, usd, percentis):
+        """Percentis exatos de ``usd`` por categoria presente da coluna"""
+        ordem = np.argsort(codigos, kind="stable")
+        codigos, usd = codigos[ordem], usd[ordem]
+        fronteiras = np.flatnonzero(np.diff(codigos)) + 1
+        inicios = np.r_[0, fronteiras] if codigos.size else np.array([], dtype=int)
+        linhas = {}
+        for codigo, grupo in zip(codigos[inicios], np.split(usd, fronteiras)):
+            if codigo < len(self.categorias[coluna]):
+                linhas[self.categorias[coluna][codigo]] = percentis_exatos(grupo, percentis)
+        return pd.DataFrame.from_dict(
+            linhas, orient="index", columns=[f"p{p}" for p in percentis]
+        ).rename_axis(coluna)
+
+    def bordas_completas(self):
+        """Bordas do histograma sem filtro de salário, ou None com bins="auto"
+
+        Com número fixo de faixas elas não dependem das linhas filtradas, e o
+        cubo pode guardar as contagens por faixa de cada célula.
+        """
+        if self.bins_histograma == "auto" or not self.usd.size:
+            return None
+        return bordas_histograma(self.usd, self.minimo, self.maximo, self.bins_histograma)
+
+    def responde_sem_linhas(self):
+        """Se, sem filtro de salário, o cubo responde tudo sem os ids das linhas
+
+        Exige quantis aproximados e o histograma por célula do cubo nas bordas
+        completas; ``calcular`` pode então receber ``linhas=None``.
+        """
+        return (
+            self.cubo is not None
+            and not self.quantis_exatos
+            and self.cubo.tem_histograma(self.bordas_completas())
+        )
+
+    def calcular(self, linhas=None, selecoes=None, faixa_salario=None):
+        """Agrega as linhas filtradas (ids ou None para todas)
+
+        Com ``selecoes`` informadas, os campos que o cubo responde vêm do
+        rollup do cubo; use apenas quando não houver filtro de salário. Se
+        ``responde_sem_linhas()``, ``linhas`` não é lida nesse caso.
+        ``faixa_salario`` define o intervalo coberto pelo histograma.
+        """
+        usar_cubo = selecoes is not None and self.cubo is not None
+        if usar_cubo and self.responde_sem_linhas():
+            usd = None
+            histograma = self.cubo.histograma(selecoes, self.bordas_completas())
+        else:
+            usd = self.usd if linhas is None else self.usd[linhas]
+            inicio, fim = faixa_salario if faixa_salario is not None else (self.minimo, self.maximo)
+            histograma = calcular_histograma(
+                usd, bordas_histograma(usd, max(inicio, self.minimo), min(fim, self.maximo), self.bins_histograma)
+            )
+
+        if usar_cubo and not self.quantis_exatos:
+            # Mescla dos esboços das células: sem ordenar nem selecionar linhas
+            valores_percentis = self.cubo.percentis(selecoes, PERCENTIS_KPI)
+            percentis_por_ano = self.cubo.percentis_por("ano", selecoes, PERCENTIS_EVOLUCAO)
+        else:
+            codigos_ano = self.codigos["ano"] if linhas is None else self.codigos["ano"][linhas]
+            valores_percentis = (
+                percentis_exatos(usd, PERCENTIS_KPI) if usd.size else np.full(len(PERCENTIS_KPI), np.nan)
+            )
+            percentis_por_ano = self._percentis_por("ano", codigos_ano, usd, PERCENTIS_EVOLUCAO)
+        percentis = dict(zip(PERCENTIS_KPI, valores_percentis))
+        quantis_aproximados = usar_cubo and not self.quantis_exatos
+
+        if usar_cubo:
+            totais = self.cubo.totais(selecoes)
+            cargo_mais_frequente = self.cubo.mais_frequente("cargo", selecoes)
+            return ResultadoAgregado(
+                total_registros=totais["contagem"],
+                salario_medio=totais["media"],
+                salario_mediano=percentis[50],
+                percentis=percentis,
+                salario_maximo=totais["maximo"],
+                salario_minimo=totais["minimo"],
+                cargo_mais_frequente=cargo_mais_frequente if cargo_mais_frequente is not None else "N/A",
+                top_cargos=self.cubo.top_media("cargo", selecoes, TOP_N),
+                media_por_senioridade=self.cubo.media_por("senioridade", selecoes),
+                media_por_ano=self.cubo.media_por("ano", selecoes),
+                percentis_por_ano=percentis_por_ano,
+                top_paises=self.cubo.top_media("residencia_iso3", selecoes, TOP_N),
+                histograma=histograma,
+                quantis_aproximados=quantis_aproximados,
+                contagem_remoto=self.cubo.contagem_por("remoto", selecoes),
+                contagem_tamanho=self.cubo.contagem_por("tamanho_empresa", selecoes),
+            )
+
+        codigos = {
+            coluna: valores if linhas is None else valores[linhas]
+            for coluna, valores in self.codigos.items()
+        }
+        cargo_mais_frequente = self._mais_frequente("cargo", codigos["cargo"])
+        return ResultadoAgregado(
+            total_registros=int(usd.size),
+            salario_medio=usd.mean() if usd.size else np.nan,
+            salario_mediano=percentis[50],
+            percentis=percentis,
+            salario_maximo=usd.max() if usd.size else np.nan,
+            salario_minimo=usd.min() if usd.size else np.nan,
+            cargo_mais_frequente=cargo_mais_frequente if cargo_mais_frequente is not None else "N/A",
+            top_cargos=self._top_media("cargo", codigos["cargo"], usd),
+            media_por_senioridade=self._media("senioridade", codigos["senioridade"], usd),
+            media_por_ano=self._media("ano", codigos["ano"], usd),
+            percentis_por_ano=percentis_por_ano,
+            top_paises=self._top_media("residencia_iso3", codigos["residencia_iso3"], usd),
+            histograma=histograma,
+            quantis_aproximados=quantis_aproximados,
+            contagem_remoto=self._contagem("remoto", codigos["remoto"]),
+            contagem_tamanho=self._contagem("tamanho_empresa", codigos["tamanho_empresa"]),
+        )
+
+    def histograma(self, linhas, bordas):
+        """Contagens por faixa das linhas filtradas (ids ou None), em bordas dadas"""
+        return calcular_histograma(self.usd if linhas is None else self.usd[linhas], bordas)
+
+    def media_por_pais_do_cargo(self, cargo, linhas=None):
+        """Média de ``usd`` por país restrita a um cargo, nas linhas filtradas"""
+        posicao_cargo = self.categorias["cargo"].get_indexer([cargo])[0]
+        codigos_cargo = self.codigos["cargo"] if linhas is None else self.codigos["cargo"][linhas]
+        do_cargo = codigos_cargo == posicao_cargo
+        ids = np.flatnonzero(do_cargo) if linhas is None else linhas[do_cargo]
+        return self._media("residencia_iso3", self.codigos["residencia_iso3"][ids], self.usd[ids])
@@ -0,0 +1,189 @@
+"""Pré-aquecimento em segundo plano dos estados de filtro mais pedidos.
+
+Depois do deploy (ou de uma troca de versão do conjunto) o cache começa
+vazio, e o primeiro usuário de cada estado paga a consulta e a montagem das
+figuras. ``Aquecedor`` mantém algumas threads de baixa prioridade que, logo
+após a carga, calculam e guardam no cache o resultado, as facetas, o mapa do
+cargo padrão e as figuras de cada estado quente:
+
+- os estados configurados (padrão: tudo selecionado, cada ano sozinho e cada
+  senioridade sozinha);
+- os estados mais frequentes no tráfego recente, registrados a cada rerun
+  com ``registrar``.
+
+Estados já em cache são pulados. O aquecimento para quando o cache de
+agregados ou o de figuras ocupa a fração configurada do orçamento, para não
+despejar entradas do tráfego real, e volta quando há espaço, um estado novo
+no tráfego ou uma nova versão do conjunto.
+
+Configuração por variáveis de ambiente:
+
+- ``DASHBOARD_AQUECIMENTO``: ``0`` desliga (padrão: ligado).
+- ``DASHBOARD_AQUECIMENTO_THREADS``: threads de aquecimento (padrão: 1).
+- ``DASHBOARD_AQUECIMENTO_ESTADOS``: lista JSON de estados, substitui os
+  padrões. Cada estado mapeia dimensões aos valores; dimensões omitidas ficam
+  com todos os valores, e ``"faixa_salario"`` opcional é ``[inicio, fim]``.
+  Ex.: ``[{"ano": [2024]}, {"ano": [2024], "senioridade": ["senior"]}]``.
+- ``DASHBOARD_AQUECIMENTO_FRACAO``: fração de cada orçamento de cache que o
+  aquecimento pode ocupar (padrão: 0.5).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from . import graficos
+from .agregacao import CARGO_MAPA
+from .indices import DIMENSOES_FILTRO
+
+logger = logging.getLogger(__name__)
+
+# Reruns recentes considerados ao escolher os estados do tráfego
+JANELA_TRAFEGO = 500
+
+# Estados do tráfego aquecidos além dos configurados
+MAXIMO_ESTADOS_TRAFEGO = 20
+
+# Pausa entre estados, para ceder a CPU aos reruns em andamento
+PAUSA_S = 0.05
+
+# Espera máxima sem trabalho antes de conferir o cache de novo
+ESPERA_OCIOSA_S = 30
+
+
+def _baixar_prioridade():
+    """Aumenta o nice da thread atual (Linux: prioridade por thread)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+def _chave(selecoes, faixa_salario):
+    """Chave hashable de um estado do tráfego (ordem dos valores não importa)"""
+    partes = tuple(sorted((dimensao, tuple(sorted(valores))) for dimensao, valores in selecoes.items()))
+    return partes, None if faixa_salario is None else tuple(faixa_salario)
+
+
+class Aquecedor:
+    """Threads que pré-calculam agregados e figuras dos estados quentes"""
+
+    def __init__(self, dados, figuras, estados=None, n_threads=1, fracao_orcamento=0.5):
+        # ``dados`` expõe ``atual()`` (ex.: ``ConjuntoAtualizavel``)
+        self.dados = dados
+        self.figuras = figuras
+        self.estados_configurados = estados
+        self.n_threads = n_threads
+        self.fracao_orcamento = fracao_orcamento
+        self.aquecidos = 0
+        self._trafego = deque(maxlen=JANELA_TRAFEGO)
+        # (versão, assinatura) já aquecidos, em andamento ou que falharam
+        self._tentados = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._threads = []
+
+    @property
+    def habilitado(self):
+        return self.n_threads > 0
+
+    def iniciar(self):
+        """Dispara as threads de aquecimento (uma vez)"""
+        if self._threads:
+            return self
+        for i in range(self.n_threads):
+            thread = threading.Thread(target=self._trabalhar, name=f"aquecimento-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def registrar(self, selecoes, faixa_salario=None):
+        """Conta o estado de um rerun para o aquecimento guiado pelo tráfego"""
+        if not self.habilitado:
+            return
+        with self._lock:
+            self._trafego.append(_chave(selecoes, faixa_salario))
+        self._acordar.set()
+
+    def estados(self, conjunto):
+        """Estados a aquecer, em ordem de prioridade: configurados e depois tráfego"""
+        todos = {dimensao: conjunto.opcoes(dimensao) for dimensao in DIMENSOES_FILTRO}
+        if self.estados_configurados is None:
+            estados = [(todos, None)]
+            estados += [(dict(todos, ano=[ano]), None) for ano in todos["ano"]]
+            estados += [(dict(todos, senioridade=[nivel]), None) for nivel in todos["senioridade"]]
+        else:
+            estados = [
+                ({**todos, **{d: v for d, v in estado.items() if d in todos}}, estado.get("faixa_salario"))
+                for estado in self.estados_configurados
+            ]
+
+        with self._lock:
+            frequentes = Counter(self._trafego).most_common(MAXIMO_ESTADOS_TRAFEGO)
+        for (partes, faixa), _ in frequentes:
+            estados.append(({**todos, **{d: list(v) for d, v in partes if d in todos}}, faixa))
+        return estados
+
+    def orcamento_esgotado(self, conjunto):
+        """Se algum dos caches já ocupa a fração do orçamento reservada ao aquecimento"""
+        return any(
+            cache.bytes_usados >= self.fracao_orcamento * cache.orcamento_bytes
+            for cache in (conjunto.cache, self.figuras.cache)
+        )
+
+    def _proximo(self, conjunto):
+        """Próximo estado fora do cache e ainda não tentado nesta versão do conjunto"""
+        for selecoes, faixa in self.estados(conjunto):
+            marcador = (conjunto.versao, conjunto.assinatura(selecoes, faixa))
+            with self._lock:
+                if marcador[1] in conjunto.cache or marcador in self._tentados:
+                    continue
+                # Versões anteriores não voltam: esquece seus estados
+                self._tentados = {m for m in self._tentados if m[0] == conjunto.versao}
+                self._tentados.add(marcador)
+            return selecoes, faixa, marcador
+        return None
+
+    def aquecer(self, conjunto, selecoes, faixa_salario=None):
+        """Calcula e guarda no cache tudo que o painel pede para o estado"""
+        resultado = conjunto.consultar(selecoes, faixa_salario)
+        conjunto.facetas(selecoes, faixa_salario)
+        for construtor, entrada in graficos.figuras_do_resultado(resultado):
+            self.figuras.figura(construtor, entrada)
+        media_cargo_pais = conjunto.consultar_mapa(CARGO_MAPA, selecoes, faixa_salario)
+        if not media_cargo_pais.empty:
+            self.figuras.figura(graficos.figura_mapa_paises, media_cargo_pais)
+
+    def _trabalhar(self):
+        _baixar_prioridade()
+        while True:
+            conjunto = self.dados.atual()
+            proximo = None if self.orcamento_esgotado(conjunto) else self._proximo(conjunto)
+            if proximo is None:
+                self._acordar.wait(ESPERA_OCIOSA_S)
+                self._acordar.clear()
+                continue
+
+            selecoes, faixa, marcador = proximo
+            try:
+                self.aquecer(conjunto, selecoes, faixa)
+                with self._lock:
+                    self.aquecidos += 1
+            except Exception:
+                logger.exception("Falha ao aquecer o estado %s", marcador[1])
+            time.sleep(PAUSA_S)
+
+
+def aquecedor_do_ambiente(dados, figuras):
+    """Aquecedor configurado pelas variáveis ``DASHBOARD_AQUECIMENTO*``, já iniciado"""
+    habilitado = os.environ.get("DASHBOARD_AQUECIMENTO", "1") != "0"
+    estados = os.environ.get("DASHBOARD_AQUECIMENTO_ESTADOS")
+    return Aquecedor(
+        dados,
+        figuras,
+        estados=json.loads(estados) if estados else None,
+        n_threads=int(os.environ.get("DASHBOARD_AQUECIMENTO_THREADS", "1")) if habilitado else 0,
+        fracao_orcamento=float(os.environ.get("DASHBOARD_AQUECIMENTO_FRACAO", "0.5")),
+    ).iniciar()
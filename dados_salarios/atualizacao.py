@@ -0,0 +1,148 @@
+"""Atualização incremental do conjunto de dados sem reiniciar o processo.
+
+``ConjuntoAtualizavel`` guarda a referência ao conjunto vigente. A cada
+``intervalo_s`` segundos (``DASHBOARD_ATUALIZACAO_S``, 0 desliga), a próxima
+consulta dispara em segundo plano uma sincronização do snapshot com a fonte
+(``fonte.sincronizar_snapshot``): linhas anexadas estendem o conjunto atual
+(``conjunto.atualizar_conjunto``) e qualquer outra mudança o reconstrói. O
+novo conjunto só substitui o vigente quando está pronto, numa única troca de
+referência; reruns em andamento terminam com a versão que já tinham. Uma
+verificação que falha (fonte inacessível) também conta para o intervalo, e só
+a primeira falha seguida gera um aviso no log.
+
+No modo compartilhado (``DASHBOARD_COMPARTILHADO``, ver ``compartilhado``),
+a sincronização roda sob a trava entre processos e a nova versão é publicada
+uma única vez; cada processo apenas passa a mapear a versão publicada, mesmo
+que a mudança tenha sido detectada por outro. Linhas anexadas só estendem o
+conjunto mapeado se ele era a versão publicada antes da sincronização; caso
+contrário a nova versão é montada a partir do snapshot inteiro.
+
+Com ``DASHBOARD_PARTICOES`` (ver ``particionado``) o conjunto é consultado
+direto dos arquivos particionados; a verificação apenas reabre o diretório
+quando a lista de arquivos muda.
+"""
+import logging
+import os
+import threading
+import time
+
+from . import compartilhado, fonte, particionado
+from .conjunto import atualizar_conjunto, carregar_conjunto
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_PADRAO_S = 60
+
+
+def intervalo_do_ambiente():
+    """Intervalo entre verificações da fonte, em segundos (DASHBOARD_ATUALIZACAO_S)"""
+    return float(os.environ.get("DASHBOARD_ATUALIZACAO_S", INTERVALO_PADRAO_S))
+
+
+class ConjuntoAtualizavel:
+    """Conjunto vigente, trocado atomicamente quando a fonte muda"""
+
+    def __init__(self, intervalo_s=None):
+        self.intervalo_s = intervalo_do_ambiente() if intervalo_s is None else intervalo_s
+        self.ultima_verificacao = time.time()
+        self.ultima_mudanca = None
+        self._falhando = False
+        self._particoes = particionado.diretorio_do_ambiente()
+        self._diretorio = compartilhado.diretorio_do_ambiente()
+        if self._particoes is not None:
+            self._conjunto = particionado.carregar_particionado(self._particoes)
+        elif self._diretorio is None:
+            self._conjunto = carregar_conjunto()
+        else:
+            self._conjunto, self._chave = compartilhado.carregar_compartilhado(self._diretorio)
+        self._lock = threading.Lock()
+
+    def atual(self):
+        """Conjunto vigente; agenda uma verificação da fonte se o intervalo venceu"""
+        vencido = self.intervalo_s > 0 and time.time() - self.ultima_verificacao >= self.intervalo_s
+        if vencido and self._lock.acquire(blocking=False):
+            threading.Thread(target=self._verificar_e_liberar, daemon=True).start()
+        return self._conjunto
+
+    def atualizar(self):
+        """Verifica a fonte agora, bloqueando até a troca; retorna o modo"""
+        with self._lock:
+            return self._verificar()
+
+    def _verificar_e_liberar(self):
+        try:
+            self._verificar()
+        except Exception as erro:
+            # Um aviso por sequência de falhas; o traceback só em nível debug
+            if not self._falhando:
+                logger.warning("Falha ao atualizar o conjunto de dados; mantendo a versão atual: %s", erro)
+            logger.debug("Detalhes da falha de atualização", exc_info=True)
+            self._falhando = True
+        else:
+            if self._falhando:
+                logger.info("Atualização do conjunto de dados restabelecida")
+            self._falhando = False
+        finally:
+            self._lock.release()
+
+    def _verificar(self):
+        """Sincroniza o snapshot e troca o conjunto se algo mudou"""
+        inicio = time.perf_counter()
+        try:
+            if self._particoes is not None:
+                modo, novo, novas = self._verificar_particoes()
+            elif self._diretorio is not None:
+                modo, novo, novas = self._verificar_compartilhado()
+            else:
+                modo, novas = fonte.sincronizar_snapshot()
+                if modo == "anexado":
+                    novo = atualizar_conjunto(self._conjunto, novas)
+                elif modo == "reconstruido":
+                    novo = carregar_conjunto()
+                else:
+                    novo = None
+        finally:
+            # Falhas também contam: a próxima tentativa espera o intervalo inteiro
+            self.ultima_verificacao = time.time()
+        if novo is None:
+            return modo
+
+        novo.versao = self._conjunto.versao + 1
+        self._conjunto = novo
+        self.ultima_mudanca = {
+            "modo": modo,
+            "linhas_novas": len(novas) if novas is not None else novo.total_linhas,
+            "segundos": time.perf_counter() - inicio,
+            "quando": self.ultima_verificacao,
+        }
+        logger.info(
+            "Conjunto atualizado (%s): versão %s, %s linhas em %.3f s",
+            modo, novo.versao, self.ultima_mudanca["linhas_novas"], self.ultima_mudanca["segundos"],
+        )
+        return modo
+
+    def _verificar_particoes(self):
+        """Reabre os arquivos particionados se algum foi criado, alterado ou removido"""
+        if particionado.impressao_particoes(self._particoes) == self._conjunto.impressao:
+            return "inalterado", None, None
+        return "reconstruido", particionado.carregar_particionado(self._particoes), None
+
+    def _verificar_compartilhado(self):
+        """Sincroniza sob a trava entre processos e mapeia a versão publicada"""
+        with compartilhado.trava(self._diretorio):
+            chave_anterior = compartilhado.chave_versao()
+            modo, novas = fonte.sincronizar_snapshot()
+            if compartilhado.chave_versao() == self._chave:
+                return modo, None, novas
+            # Só estende o conjunto mapeado se ele era a versão vigente antes da
+            # sincronização; senão outro processo já anexou linhas que ele não tem
+            incremental = modo == "anexado" and chave_anterior == self._chave
+            construir = (lambda: atualizar_conjunto(self._conjunto, novas)) if incremental else None
+            novo, self._chave = compartilhado.carregar_compartilhado(self._diretorio, construir, travado=True)
+        if modo == "inalterado":
+            # Outro processo já sincronizou e publicou esta versão
+            modo, novas = "publicado", None
+        elif modo == "anexado" and not incremental:
+            # Versão montada do snapshot inteiro (ou já publicada por outro processo)
+            modo, novas = "reconstruido", None
+        return modo, novo, novas
@@ -0,0 +1,132 @@
+"""Cache LRU compartilhado pelo processo, com orçamento de memória.
+
+Guarda resultados já computados (agregados, não o DataFrame filtrado)
+sob uma assinatura normalizada dos filtros, de modo que sessões diferentes
+com o mesmo estado da barra lateral reaproveitem o mesmo cálculo.
+"""
+import dataclasses
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def orcamento_do_ambiente(variavel, padrao_mb):
+    """Orçamento em bytes lido de uma variável de ambiente em MB"""
+    return int(float(os.environ.get(variavel, padrao_mb)) * 1024 ** 2)
+
+
+def estimar_bytes(objeto):
+    """Estimativa do tamanho em memória de um valor guardado no cache"""
+    if isinstance(objeto, (pd.Series, pd.DataFrame, pd.Index)):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, "sum") else uso)
+    if dataclasses.is_dataclass(objeto) and not isinstance(objeto, type):
+        return sys.getsizeof(objeto) + sum(
+            estimar_bytes(getattr(objeto, campo.name)) for campo in dataclasses.fields(objeto)
+        )
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(
+            estimar_bytes(chave) + estimar_bytes(valor) for chave, valor in objeto.items()
+        )
+    if isinstance(objeto, (list, tuple)):
+        return sys.getsizeof(objeto) + sum(estimar_bytes(item) for item in objeto)
+    return sys.getsizeof(objeto)
+
+
+class CacheLRU:
+    """Cache LRU thread-safe limitado por bytes, com contadores de acerto/falha"""
+
+    def __init__(self, orcamento_bytes, tamanho_de=estimar_bytes):
+        self.orcamento_bytes = orcamento_bytes
+        self.tamanho_de = tamanho_de
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._calculando = {}
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, chave):
+        return chave in self._entradas
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor em cache (marcando-o como recente) ou ``padrao``"""
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return self._entradas[chave][0]
+            self.falhas += 1
+            return padrao
+
+    def guardar(self, chave, valor):
+        """Guarda um valor, despejando os menos recentes se passar do orçamento"""
+        tamanho = self.tamanho_de(valor)
+        if tamanho > self.orcamento_bytes:
+            return
+        with self._lock:
+            if chave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(chave)[1]
+            self._entradas[chave] = (valor, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.orcamento_bytes:
+                _, (_, tamanho_antigo) = self._entradas.popitem(last=False)
+                self.bytes_usados -= tamanho_antigo
+                self.despejos += 1
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Retorna o valor em cache ou calcula uma única vez por chave
+
+        Sessões concorrentes pedindo a mesma chave esperam o primeiro cálculo
+        em vez de repeti-lo.
+        """
+        valor = self.obter(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+
+        with self._lock:
+            lock_chave = self._calculando.setdefault(chave, threading.Lock())
+        try:
+            with lock_chave:
+                with self._lock:
+                    if chave in self._entradas:
+                        self._entradas.move_to_end(chave)
+                        return self._entradas[chave][0]
+                valor = calcular()
+                self.guardar(chave, valor)
+        finally:
+            # Também quando ``calcular`` falha: a próxima chamada tenta de novo
+            with self._lock:
+                if self._calculando.get(chave) is lock_chave:
+                    del self._calculando[chave]
+        return valor
+
+    def limpar(self):
+        """Remove todas as entradas (mantém os contadores)"""
+        with self._lock:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+    def estatisticas(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "entradas": len(self._entradas),
+                "bytes_usados": self.bytes_usados,
+                "orcamento_bytes": self.orcamento_bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+_AUSENTE = object()
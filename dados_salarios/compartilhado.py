@@ -0,0 +1,195 @@
+"""Conjunto de dados compartilhado entre processos via arquivos Arrow mapeados.
+
+Com ``DASHBOARD_COMPARTILHADO`` apontando para um diretório, o conjunto
+preparado (DataFrame, índices e códigos do motor) é publicado uma vez em
+arquivos Arrow IPC sem compressão, e cada processo do painel apenas os mapeia
+em memória (somente leitura). As colunas e vetores viram visões sobre o mapa,
+sem cópia nem parsing, de modo que as páginas ficam no cache do sistema
+operacional e são compartilhadas por todos os processos. Estruturas pequenas
+(cubo, categorias, relatório de memória) vão num ``pickle`` ao lado.
+
+Cada versão fica em ``conjunto-<chave>/``, com a chave derivada do estado do
+snapshot e dos parâmetros que mudam o pré-cálculo. O primeiro processo que não
+encontra a versão a constrói, sob uma trava de arquivo, num diretório
+temporário renomeado ao fim; os demais esperam a trava e mapeiam o resultado.
+Versões antigas são apagadas; processos que ainda as mapeiam continuam
+válidos até trocarem de versão.
+
+Vetores calculados sob demanda (ordenações por coluna que não ``usd``) e
+resultados em cache continuam privados de cada processo.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+
+from . import fonte
+from .conjunto import ConjuntoDados, preparar_conjunto
+from .agregacao import MotorAgregacao
+from .indices import IndiceBitmap, IndiceOrdenado, OrdenacoesColunas
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Incrementar quando o formato dos arquivos compartilhados mudar
+VERSAO_COMPARTILHADO = 2
+
+
+def diretorio_do_ambiente():
+    """Diretório do modo compartilhado (DASHBOARD_COMPARTILHADO), ou None"""
+    diretorio = os.environ.get("DASHBOARD_COMPARTILHADO")
+    return Path(diretorio) if diretorio else None
+
+
+def chave_versao():
+    """Chave da versão publicada para o snapshot atual e os parâmetros em uso"""
+    estado = fonte.estado_snapshot()
+    partes = {
+        "formato": VERSAO_COMPARTILHADO,
+        "snapshot": fonte.VERSAO_SNAPSHOT,
+        "origem": estado.get("origem"),
+        "bytes_lidos": estado.get("bytes_lidos"),
+        "impressao": estado.get("impressao"),
+        "bins": os.environ.get("DASHBOARD_HISTOGRAMA_BINS", ""),
+        "quantis_exatos": os.environ.get("DASHBOARD_QUANTIS_EXATOS", "0"),
+    }
+    return hashlib.sha256(json.dumps(partes, sort_keys=True).encode()).hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def trava(diretorio):
+    """Trava exclusiva entre processos sobre o diretório compartilhado"""
+    diretorio.mkdir(parents=True, exist_ok=True)
+    with open(diretorio / ".trava", "w") as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _gravar_arrow(tabela, caminho):
+    """Grava um arquivo Arrow IPC sem compressão e em um único bloco"""
+    with pa.OSFile(str(caminho), "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela, max_chunksize=max(tabela.num_rows, 1))
+
+
+def _ler_arrow(caminho):
+    """Tabela Arrow cujos buffers apontam para o arquivo mapeado"""
+    return pa.ipc.open_file(pa.memory_map(str(caminho), "r")).read_all()
+
+
+def publicar(conjunto, destino):
+    """Grava o conjunto preparado no diretório ``destino`` (atômico)"""
+    temporario = destino.with_name(destino.name + f".{os.getpid()}.tmp")
+    shutil.rmtree(temporario, ignore_errors=True)
+    temporario.mkdir(parents=True)
+
+    _gravar_arrow(pa.Table.from_pandas(conjunto.df, preserve_index=False), temporario / "dados.arrow")
+
+    motor = conjunto.motor
+    vetores = {
+        "usd_ordem": conjunto.indice_salario.ordem,
+        "usd_ordenado": conjunto.indice_salario.valores_ordenados,
+        "motor_usd": motor.usd,
+    }
+    vetores.update({f"codigo_{coluna}": codigos for coluna, codigos in motor.codigos.items()})
+    _gravar_arrow(pa.table(vetores), temporario / "indices.arrow")
+
+    chaves_bitmaps = [
+        (dimensao, valor)
+        for dimensao, bitmaps in conjunto.indice_filtros.bitmaps.items()
+        for valor in bitmaps
+    ]
+    _gravar_arrow(
+        pa.table({
+            f"b{i}": conjunto.indice_filtros.bitmaps[dimensao][valor]
+            for i, (dimensao, valor) in enumerate(chaves_bitmaps)
+        }),
+        temporario / "bitmaps.arrow",
+    )
+
+    estruturas = {
+        "relatorio_memoria": conjunto.relatorio_memoria,
+        "cubo": conjunto.cubo,
+        "categorias": motor.categorias,
+        "bins_histograma": motor.bins_histograma,
+        "quantis_exatos": motor.quantis_exatos,
+        "chaves_bitmaps": chaves_bitmaps,
+    }
+    with open(temporario / "estruturas.pkl", "wb") as arquivo:
+        pickle.dump(estruturas, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    try:
+        os.rename(temporario, destino)
+    except OSError:
+        # Outro processo publicou a mesma versão primeiro
+        shutil.rmtree(temporario, ignore_errors=True)
+
+
+def abrir(origem):
+    """Conjunto montado sobre os arquivos mapeados de ``origem``, sem cópia"""
+    df = _ler_arrow(origem / "dados.arrow").to_pandas(split_blocks=True)
+    with open(origem / "estruturas.pkl", "rb") as arquivo:
+        estruturas = pickle.load(arquivo)
+
+    indices = _ler_arrow(origem / "indices.arrow")
+    vetor = lambda nome: indices.column(nome).to_numpy()
+    bitmaps_arrow = _ler_arrow(origem / "bitmaps.arrow")
+    bitmaps = {}
+    for i, (dimensao, valor) in enumerate(estruturas["chaves_bitmaps"]):
+        bitmaps.setdefault(dimensao, {})[valor] = bitmaps_arrow.column(f"b{i}").to_numpy()
+
+    cubo = estruturas["cubo"]
+    indice_salario = IndiceOrdenado.de_ordem(vetor("usd_ordem"), vetor("usd_ordenado"))
+    return ConjuntoDados(
+        df=df,
+        relatorio_memoria=estruturas["relatorio_memoria"],
+        indice_filtros=IndiceBitmap.de_bitmaps(len(df), bitmaps),
+        indice_salario=indice_salario,
+        ordenacoes=OrdenacoesColunas(df, {"usd": indice_salario.ordem}),
+        cubo=cubo,
+        motor=MotorAgregacao.de_codigos(
+            vetor("motor_usd"),
+            {coluna: vetor(f"codigo_{coluna}") for coluna in estruturas["categorias"]},
+            estruturas["categorias"],
+            cubo,
+            bins_histograma=estruturas["bins_histograma"],
+            quantis_exatos=estruturas["quantis_exatos"],
+        ),
+    )
+
+
+def _apagar_antigas(diretorio, atual):
+    for versao in diretorio.glob("conjunto-*"):
+        if versao != atual:
+            shutil.rmtree(versao, ignore_errors=True)
+
+
+def carregar_compartilhado(diretorio, construir=None, travado=False):
+    """Mapeia a versão atual do conjunto, publicando-a antes se ainda não existir
+
+    ``construir`` devolve o conjunto a publicar (padrão: preparar a partir do
+    snapshot); só é chamado pelo processo que obtém a trava primeiro.
+    ``travado`` indica que quem chama já detém a trava (a trava não é
+    reentrante). Retorna ``(conjunto, chave)``.
+    """
+    chave = chave_versao()
+    destino = diretorio / f"conjunto-{chave}"
+    if not destino.exists():
+        with contextlib.nullcontext() if travado else trava(diretorio):
+            if not destino.exists():
+                conjunto = construir() if construir else preparar_conjunto(fonte.carregar_dados())
+                publicar(conjunto, destino)
+                _apagar_antigas(diretorio, destino)
+    return abrir(destino), chave
@@ -0,0 +1,347 @@
+"""Conjunto de dados carregado: DataFrame normalizado mais seus índices."""
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from . import exportacao, fonte, tipos
+from .agregacao import (
+    BINS_HISTOGRAMA,
+    MotorAgregacao,
+    ResultadoComparacao,
+    bordas_comparacao,
+    histograma_segmentos,
+)
+from .cache import CacheLRU, orcamento_do_ambiente
+from .cubo import CuboSalarios
+from .indices import IndiceBitmap, IndiceOrdenado, OrdenacoesColunas
+
+
+@dataclass
+class ConjuntoDados:
+    """DataFrame de salários e as estruturas pré-computadas sobre ele"""
+
+    df: pd.DataFrame
+    relatorio_memoria: pd.DataFrame
+    indice_filtros: IndiceBitmap
+    indice_salario: IndiceOrdenado
+    ordenacoes: OrdenacoesColunas
+    cubo: CuboSalarios
+    motor: MotorAgregacao
+    # Incrementada a cada atualização da fonte (ver ``atualizacao``)
+    versao: int = 1
+    # Agregados por assinatura de filtros; orçamento em DASHBOARD_CACHE_MB
+    cache: CacheLRU = field(
+        default_factory=lambda: CacheLRU(orcamento_do_ambiente("DASHBOARD_CACHE_MB", 64))
+    )
+
+    def assinatura(self, selecoes, faixa_salario=None):
+        """Chave normalizada e independente de ordem para um estado de filtros
+
+        Dimensões com todos os valores viram ``"*"`` e uma faixa de salário
+        que cobre tudo vira ``None``, para que estados equivalentes coincidam.
+        """
+        partes = []
+        for dimensao in sorted(selecoes):
+            valores = self.indice_filtros.bitmaps[dimensao]
+            selecionados = set(selecoes[dimensao])
+            if selecionados.issuperset(valores):
+                partes.append((dimensao, "*"))
+            else:
+                partes.append((dimensao, tuple(v for v in valores if v in selecionados)))
+        if faixa_salario is None or self.indice_salario.cobre_tudo(*faixa_salario):
+            faixa = None
+        else:
+            faixa = (faixa_salario[0], faixa_salario[1])
+        return tuple(partes), faixa
+
+    def selecionar_linhas(self, selecoes, faixa_salario=None):
+        """Ids ordenados das linhas filtradas, ou None quando nada é filtrado
+
+        ``selecoes`` mapeia dimensão -> valores selecionados e
+        ``faixa_salario`` é o intervalo (inicio, fim) em USD.
+        """
+        bitmap = self.indice_filtros.selecionar(selecoes)
+
+        linhas = None
+        if faixa_salario is not None and not self.indice_salario.cobre_tudo(*faixa_salario):
+            linhas = self.indice_salario.linhas_no_intervalo(*faixa_salario)
+
+        if linhas is None:
+            if bitmap is None:
+                return None
+            return np.flatnonzero(self.indice_filtros.para_mascara(bitmap))
+
+        if bitmap is not None:
+            linhas = linhas[self.indice_filtros.contem(bitmap, linhas)]
+        return np.sort(linhas)
+
+    def recortar(self, linhas):
+        """DataFrame com as linhas indicadas (None para todas)"""
+        if linhas is None:
+            return self.df
+        return self.df.take(linhas)
+
+    def pagina(self, linhas, inicio, tamanho, ordenar_por=None, crescente=True):
+        """Fatia [inicio, inicio + tamanho) das linhas filtradas, já ordenada
+
+        A ordenação usa a permutação pré-computada da coluna, filtrada pelas
+        linhas selecionadas; só a página pedida é materializada.
+        """
+        if ordenar_por is None:
+            ids = np.arange(len(self.df)) if linhas is None else linhas
+            if not crescente:
+                ids = ids[::-1]
+        else:
+            ordem = self.ordenacoes.ordem(ordenar_por)
+            if not crescente:
+                ordem = ordem[::-1]
+            if linhas is None:
+                ids = ordem
+            else:
+                selecionadas = np.zeros(len(self.df), dtype=bool)
+                selecionadas[linhas] = True
+                ids = ordem[selecionadas[ordem]]
+        return self.df.take(ids[inicio:inicio + tamanho])
+
+    def filtrar(self, selecoes, faixa_salario=None):
+        """DataFrame com as linhas que atendem aos filtros"""
+        return self.recortar(self.selecionar_linhas(selecoes, faixa_salario))
+
+    def agregar(self, linhas, selecoes, faixa_salario=None):
+        """KPIs e séries dos gráficos em uma única passada
+
+        ``linhas`` é o resultado de ``selecionar_linhas`` para os mesmos filtros.
+        """
+        # Sem filtro de salário, o cubo responde médias e contagens
+        if faixa_salario is None or self.indice_salario.cobre_tudo(*faixa_salario):
+            return self.motor.calcular(linhas, selecoes=selecoes, faixa_salario=faixa_salario)
+        return self.motor.calcular(linhas, faixa_salario=faixa_salario)
+
+    def consultar(self, selecoes, faixa_salario=None):
+        """Resultado agregado dos filtros, servido do cache quando possível"""
+        def calcular():
+            # Sem filtro de salário o cubo pode dispensar a seleção de linhas
+            sem_faixa = faixa_salario is None or self.indice_salario.cobre_tudo(*faixa_salario)
+            if sem_faixa and self.motor.responde_sem_linhas():
+                return self.motor.calcular(None, selecoes=selecoes, faixa_salario=faixa_salario)
+            linhas = self.selecionar_linhas(selecoes, faixa_salario)
+            return self.agregar(linhas, selecoes, faixa_salario)
+
+        return self.cache.obter_ou_calcular(self.assinatura(selecoes, faixa_salario), calcular)
+
+    def _linhas_segmentos(self, segmentos):
+        """Ids das linhas de cada segmento ``(selecoes, faixa)``, refinando a base comum
+
+        A base (união dos segmentos) é selecionada uma vez pelos índices; cada
+        segmento só confere seus bitmaps e sua faixa nas linhas da base.
+        """
+        if len(segmentos) < 2:
+            return [self.selecionar_linhas(*segmento) for segmento in segmentos]
+        base = self.selecionar_linhas(*segmento_base(segmentos))
+        resultado = []
+        for selecoes, faixa_salario in segmentos:
+            bitmap = self.indice_filtros.selecionar(selecoes)
+            restringe_faixa = faixa_salario is not None and not self.indice_salario.cobre_tudo(*faixa_salario)
+            if bitmap is None and not restringe_faixa:
+                resultado.append(None)
+            elif base is None:
+                resultado.append(self.selecionar_linhas(selecoes, faixa_salario))
+            else:
+                manter = np.ones(len(base), dtype=bool)
+                if bitmap is not None:
+                    manter &= self.indice_filtros.contem(bitmap, base)
+                if restringe_faixa:
+                    usd = self.motor.usd[base]
+                    manter &= (usd >= faixa_salario[0]) & (usd <= faixa_salario[1])
+                resultado.append(base[manter])
+        return resultado
+
+    def comparar(self, segmento_a, segmento_b):
+        """Resultados de dois segmentos ``(selecoes, faixa_salario)`` lado a lado
+
+        Cada lado fica no cache sob sua própria assinatura, então só o lado
+        que mudou é recalculado; os que faltam saem de uma única seleção da
+        base comum (``_linhas_segmentos``). O histograma usa as mesmas faixas
+        nos dois lados.
+        """
+        segmentos = [segmento_a, segmento_b]
+        chaves = [self.assinatura(*segmento) for segmento in segmentos]
+        bordas = bordas_comparacao(
+            [faixa for _, faixa in segmentos], self.motor.minimo, self.motor.maximo, self.motor.bins_histograma
+        )
+        chaves_histograma = [("histograma", chave, bordas[0], bordas[-1], len(bordas)) for chave in chaves]
+        faltando = [
+            i for i in range(len(segmentos))
+            if chaves[i] not in self.cache or chaves_histograma[i] not in self.cache
+        ]
+        linhas = dict(zip(faltando, self._linhas_segmentos([segmentos[i] for i in faltando])))
+
+        def linhas_do_segmento(i):
+            if i not in linhas:
+                # Despejado do cache entre a conferência e o uso
+                linhas[i] = self.selecionar_linhas(*segmentos[i])
+            return linhas[i]
+
+        resultados, histogramas = [], []
+        for i, (selecoes, faixa_salario) in enumerate(segmentos):
+            resultados.append(self.cache.obter_ou_calcular(
+                chaves[i], lambda: self.agregar(linhas_do_segmento(i), selecoes, faixa_salario)
+            ))
+            histogramas.append(self.cache.obter_ou_calcular(
+                chaves_histograma[i], lambda: self.motor.histograma(linhas_do_segmento(i), bordas)
+            ))
+        return ResultadoComparacao(
+            *resultados, histograma_segmentos(bordas, [h["quantidade"].to_numpy() for h in histogramas])
+        )
+
+    @property
+    def total_linhas(self):
+        return len(self.df)
+
+    @property
+    def colunas(self):
+        return self.df.columns.tolist()
+
+    def limites_salario(self):
+        """Menor e maior salário em USD, do índice ordenado"""
+        return self.indice_salario.minimo, self.indice_salario.maximo
+
+    def exportar(self, formato, linhas=None):
+        """Arquivo de exportação das linhas filtradas (ver ``exportacao``)"""
+        return exportacao.exportar(formato, self.df, linhas)
+
+    def opcoes(self, dimensao):
+        """Valores de uma dimensão de filtro, calculados uma vez no carregamento"""
+        return self.indice_filtros.valores(dimensao)
+
+    def facetas(self, selecoes, faixa_salario=None):
+        """Contagem por opção de cada dimensão de filtro sob os demais filtros
+
+        Sem filtro de salário as contagens saem do cubo; com filtro, dos
+        bitmaps de cada valor restritos às linhas da faixa.
+        """
+        def calcular():
+            if faixa_salario is None or self.indice_salario.cobre_tudo(*faixa_salario):
+                contagens = self.cubo.contagens_facetas(selecoes)
+            else:
+                na_faixa = self.indice_salario.linhas_no_intervalo(*faixa_salario)
+                contagens = {}
+                for dimensao, bitmaps in self.indice_filtros.bitmaps.items():
+                    demais = {d: v for d, v in selecoes.items() if d != dimensao}
+                    bitmap = self.indice_filtros.selecionar(demais)
+                    linhas = na_faixa if bitmap is None else na_faixa[self.indice_filtros.contem(bitmap, na_faixa)]
+                    contagens[dimensao] = pd.Series({
+                        valor: int(self.indice_filtros.contem(bitmap_valor, linhas).sum())
+                        for valor, bitmap_valor in bitmaps.items()
+                    }, dtype="int64")
+            return {
+                dimensao: serie.reindex(self.opcoes(dimensao), fill_value=0).astype("int64")
+                for dimensao, serie in contagens.items()
+            }
+
+        chave = ("facetas", self.assinatura(selecoes, faixa_salario))
+        return self.cache.obter_ou_calcular(chave, calcular)
+
+    def cargos(self):
+        """Cargos distintos, em ordem alfabética"""
+        return list(self.cubo.intervalos_cargo)
+
+    def consultar_mapa(self, cargo, selecoes, faixa_salario=None):
+        """Salário médio por país de um cargo, servido do cache quando possível
+
+        Sem filtro de salário a resposta sai da tabela cargo × país do cubo;
+        com filtro, das linhas filtradas daquele cargo.
+        """
+        def calcular():
+            if faixa_salario is None or self.indice_salario.cobre_tudo(*faixa_salario):
+                return self.cubo.media_por_pais_do_cargo(cargo, selecoes)
+            linhas = self.selecionar_linhas(selecoes, faixa_salario)
+            return self.motor.media_por_pais_do_cargo(cargo, linhas)
+
+        chave = ("mapa", cargo, self.assinatura(selecoes, faixa_salario))
+        return self.cache.obter_ou_calcular(chave, calcular)
+
+
+def segmento_base(segmentos):
+    """Filtros da união dos segmentos ``(selecoes, faixa_salario)``
+
+    Cada dimensão presente em todos os segmentos fica com a união dos valores
+    e a faixa de salário cobre todas as faixas (``None`` se algum não filtra).
+    """
+    dimensoes = set.intersection(*(set(selecoes) for selecoes, _ in segmentos))
+    selecoes = {
+        dimensao: sorted(set().union(*(selecoes[dimensao] for selecoes, _ in segmentos)))
+        for dimensao in dimensoes
+    }
+    faixas = [faixa for _, faixa in segmentos]
+    if any(faixa is None for faixa in faixas):
+        return selecoes, None
+    return selecoes, (min(faixa[0] for faixa in faixas), max(faixa[1] for faixa in faixas))
+
+
+def _bins_do_ambiente():
+    """Número de faixas do histograma (DASHBOARD_HISTOGRAMA_BINS, ou "auto")"""
+    bins = os.environ.get("DASHBOARD_HISTOGRAMA_BINS", str(BINS_HISTOGRAMA))
+    return "auto" if bins == "auto" else int(bins)
+
+
+def preparar_conjunto(df):
+    """Normaliza os tipos e constrói os índices de um DataFrame bruto"""
+    df, relatorio_memoria = tipos.normalizar_tipos(df)
+    df = df.reset_index(drop=True)
+    motor = MotorAgregacao(
+        df,
+        bins_histograma=_bins_do_ambiente(),
+        quantis_exatos=os.environ.get("DASHBOARD_QUANTIS_EXATOS", "0") == "1",
+    )
+    # O cubo guarda o histograma por célula nas bordas usadas sem filtro de salário
+    motor.cubo = cubo = CuboSalarios(df, bordas_histograma=motor.bordas_completas())
+    indice_salario = IndiceOrdenado(df["usd"])
+    return ConjuntoDados(
+        df=df,
+        relatorio_memoria=relatorio_memoria,
+        indice_filtros=IndiceBitmap(df),
+        indice_salario=indice_salario,
+        ordenacoes=OrdenacoesColunas(df, {"usd": indice_salario.ordem}),
+        cubo=cubo,
+        motor=motor,
+    )
+
+
+def atualizar_conjunto(conjunto, novas):
+    """Novo conjunto com as linhas ``novas`` anexadas, sem reconstruir do zero
+
+    Índices, cubo e motor são estendidos com o custo das linhas novas; o
+    conjunto recebido não é alterado e continua servindo quem já o usa. O
+    cache de agregados começa vazio, pois os resultados antigos ficaram velhos.
+    """
+    if novas.empty:
+        return conjunto
+    novas, relatorio_novas = tipos.normalizar_tipos(novas[conjunto.df.columns].reset_index(drop=True))
+    df = tipos.concatenar(conjunto.df, novas)
+
+    relatorio_memoria = conjunto.relatorio_memoria.copy()
+    relatorio_memoria["bytes_antes"] += relatorio_novas["bytes_antes"]
+    relatorio_memoria["bytes_depois"] = df.memory_usage(index=False, deep=True)
+    relatorio_memoria["tipo"] = df.dtypes.astype(str)
+    relatorio_memoria["bytes_economizados"] = relatorio_memoria["bytes_antes"] - relatorio_memoria["bytes_depois"]
+
+    cubo = conjunto.cubo.anexar(novas)
+    indice_salario = conjunto.indice_salario.anexar(novas["usd"])
+    return ConjuntoDados(
+        df=df,
+        relatorio_memoria=relatorio_memoria,
+        indice_filtros=conjunto.indice_filtros.anexar(novas),
+        indice_salario=indice_salario,
+        ordenacoes=OrdenacoesColunas(df, {"usd": indice_salario.ordem}),
+        cubo=cubo,
+        motor=conjunto.motor.anexar(novas, cubo),
+        cache=CacheLRU(conjunto.cache.orcamento_bytes),
+    )
+
+
+def carregar_conjunto():
+    """Carrega o snapshot local e prepara o conjunto de dados"""
+    return preparar_conjunto(fonte.carregar_dados())
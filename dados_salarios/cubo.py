@@ -0,0 +1,391 @@
+"""Cubo OLAP pré-agregado sobre as dimensões de filtro.
+
+Cada célula (ano, senioridade, contrato, tamanho_empresa) guarda contagem,
+soma e soma dos quadrados de ``usd``, além de mínimo e máximo. As tabelas de
+detalhe repetem contagem e soma quebradas por ``cargo``, ``residencia_iso3``
+e ``remoto``. Sem filtro de salário, os KPIs e os gráficos de barras saem de
+um rollup dessas tabelas, cujo tamanho não depende do número de linhas.
+
+A tabela cargo × país (com as dimensões de filtro) fica ordenada por cargo,
+com o intervalo de cada cargo indexado: o mapa de qualquer cargo é uma fatia
+dessa tabela, sem varrer linhas.
+
+Cada célula também guarda um esboço de quantis (``quantis.EsbocosQuantis``),
+de modo que mediana e percentis saem da mescla dos esboços das células. Com
+``bordas_histograma``, cada célula guarda ainda a contagem por faixa do
+histograma nessas bordas fixas, e o histograma do recorte sai da soma das
+células selecionadas.
+
+As dimensões das células ficam também como códigos inteiros: a máscara de um
+recorte é um lookup por dimensão e os rollups por dimensão de filtro usam
+``np.bincount``, sem ``isin``/``groupby`` do pandas a cada consulta.
+
+Os rankings (mais frequente e top-k por média) somam as tabelas de detalhe com
+``np.bincount`` e usam seleção parcial (``frequentes``).
+
+``anexar`` soma linhas novas ao cubo: monta um cubo só com elas e o combina
+com o atual renumerando as células, sem revisitar as linhas antigas.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from .agregacao import faixas_dos_valores
+from .frequentes import indices_top_k
+from .indices import DIMENSOES_FILTRO
+from .quantis import ERRO_RELATIVO, EsbocosQuantis
+
+DETALHES = ["cargo", "residencia_iso3", "remoto"]
+
+
+def _agregar(df, chaves, completo=False):
+    """Agrupa ``df`` pelas chaves somando contagem/soma (e extras se completo)"""
+    usd = df["usd"].astype("float64")
+    base = pd.DataFrame({chave: df[chave] for chave in chaves})
+    base["contagem"] = 1
+    base["soma"] = usd
+    agregacoes = {"contagem": "sum", "soma": "sum"}
+    if completo:
+        base["soma_quadrados"] = usd * usd
+        base["minimo"] = usd
+        base["maximo"] = usd
+        agregacoes.update(soma_quadrados="sum", minimo="min", maximo="max")
+    return base.groupby(chaves, observed=True, sort=True).agg(agregacoes).reset_index()
+
+
+class TabelaDetalhe:
+    """Contagem e soma de ``usd`` por (célula do cubo, valor de uma coluna)"""
+
+    def __init__(self, celula, codigo, contagem, soma, categorias):
+        # Soma as entradas repetidas de cada par (célula, valor)
+        self.categorias = categorias
+        n_itens = max(len(categorias), 1)
+        chaves = np.asarray(celula, dtype=np.int64) * n_itens + codigo
+        unicas, inversa = np.unique(chaves, return_inverse=True)
+        self.celula = unicas // n_itens
+        self.codigo = unicas % n_itens
+        self.contagem = np.bincount(inversa, weights=contagem, minlength=len(unicas)).astype(np.int64)
+        self.soma = np.bincount(inversa, weights=soma, minlength=len(unicas))
+
+    @classmethod
+    def das_linhas(cls, celula_da_linha, serie, usd):
+        """Tabela a partir da célula, do valor e do ``usd`` de cada linha"""
+        codigos, categorias = pd.factorize(serie, sort=True)
+        presentes = codigos >= 0
+        return cls(
+            celula_da_linha[presentes], codigos[presentes], np.ones(presentes.sum()),
+            usd[presentes], pd.Index(categorias.tolist(), name=serie.name),
+        )
+
+    def combinar(self, outra, celulas_desta, celulas_da_outra):
+        """Soma duas tabelas, renumerando células e unindo as categorias"""
+        categorias = pd.Index(
+            sorted(set(self.categorias.tolist()) | set(outra.categorias.tolist())), name=self.categorias.name
+        )
+        return TabelaDetalhe(
+            np.concatenate([celulas_desta[self.celula], celulas_da_outra[outra.celula]]),
+            np.concatenate([
+                categorias.get_indexer(self.categorias)[self.codigo],
+                categorias.get_indexer(outra.categorias)[outra.codigo],
+            ]),
+            np.concatenate([self.contagem, outra.contagem]),
+            np.concatenate([self.soma, outra.soma]),
+            categorias,
+        )
+
+    def somar(self, mascara_celulas):
+        """Contagem e soma por valor, somadas nas células selecionadas"""
+        selecionados = mascara_celulas[self.celula]
+        codigos = self.codigo[selecionados]
+        n_itens = len(self.categorias)
+        contagem = np.bincount(codigos, weights=self.contagem[selecionados], minlength=n_itens)
+        soma = np.bincount(codigos, weights=self.soma[selecionados], minlength=n_itens)
+        return contagem, soma
+
+
+class CuboSalarios:
+    """Agregados de ``usd`` por célula das dimensões de filtro"""
+
+    def __init__(self, df, dimensoes=DIMENSOES_FILTRO, detalhes=DETALHES, erro_relativo=ERRO_RELATIVO,
+                 bordas_histograma=None):
+        self.dimensoes = list(dimensoes)
+        self.bordas_histograma = bordas_histograma
+        celulas = _agregar(df, self.dimensoes, completo=True)
+        # Célula de cada linha, na mesma ordem das linhas de celulas
+        celula_da_linha = df.groupby(self.dimensoes, observed=True, sort=True).ngroup().to_numpy()
+        usd = df["usd"].to_numpy(dtype="float64")
+        self._montar(
+            celulas,
+            EsbocosQuantis(usd, celula_da_linha, len(celulas), erro_relativo),
+            {detalhe: TabelaDetalhe.das_linhas(celula_da_linha, df[detalhe], usd) for detalhe in detalhes},
+            _agregar(df, ["cargo", "residencia_iso3"] + self.dimensoes),
+            self._contar_faixas(usd, celula_da_linha, len(celulas)),
+        )
+
+    def _contar_faixas(self, usd, celula_da_linha, n_celulas):
+        """Matriz célula × faixa do histograma, ou None sem bordas (ou com valores fora delas)"""
+        if self.bordas_histograma is None:
+            return None
+        n_faixas = len(self.bordas_histograma) - 1
+        posicoes, dentro = faixas_dos_valores(usd, self.bordas_histograma)
+        if not dentro.all():
+            return None
+        contagens = np.bincount(
+            np.asarray(celula_da_linha, dtype=np.int64) * n_faixas + posicoes, minlength=n_celulas * n_faixas
+        )
+        return contagens.reshape(n_celulas, n_faixas)
+
+    def _montar(self, celulas, esbocos, detalhes, cargo_pais, faixas):
+        """Guarda as tabelas do cubo e deriva os códigos das células e o índice por cargo"""
+        self.celulas = celulas
+        self.esbocos = esbocos
+        self.detalhes = detalhes
+        self.faixas = faixas
+
+        # Código de cada célula em cada dimensão e colunas numéricas como arrays
+        self.codigos_celulas = {}
+        self.valores_celulas = {}
+        self._listas_celulas = {}
+        for dimensao in self.dimensoes:
+            codigos, valores = pd.factorize(celulas[dimensao], sort=True)
+            self.codigos_celulas[dimensao] = codigos
+            self.valores_celulas[dimensao] = pd.Index(valores, name=dimensao)
+            self._listas_celulas[dimensao] = self.valores_celulas[dimensao].tolist()
+        self.colunas_celulas = {
+            coluna: celulas[coluna].to_numpy()
+            for coluna in ("contagem", "soma", "soma_quadrados", "minimo", "maximo")
+        }
+
+        # Cargo × país: ordenada por cargo, com o intervalo de linhas de cada cargo
+        codigos_cargo, cargos = pd.factorize(cargo_pais["cargo"], sort=True)
+        ordem = np.argsort(codigos_cargo, kind="stable")
+        self.cargo_pais = cargo_pais.iloc[ordem].reset_index(drop=True)
+        limites = np.searchsorted(codigos_cargo[ordem], np.arange(len(cargos) + 1))
+        self.intervalos_cargo = {
+            cargo: (limites[i], limites[i + 1]) for i, cargo in enumerate(cargos.tolist())
+        }
+
+    def anexar(self, novas):
+        """Novo cubo com as linhas de ``novas`` somadas; o cubo atual não muda
+
+        O custo depende das linhas novas e do tamanho das tabelas do cubo
+        (células e detalhes), não do total de linhas já agregadas.
+        """
+        if novas.empty:
+            return self
+        delta = CuboSalarios(
+            novas, self.dimensoes, list(self.detalhes), self.esbocos.erro_relativo,
+            bordas_histograma=self.bordas_histograma,
+        )
+
+        juntas = pd.concat([self.celulas, delta.celulas], ignore_index=True)
+        grupos = juntas.groupby(self.dimensoes, observed=True, sort=True)
+        nova_celula = grupos.ngroup().to_numpy()
+        celulas = grupos.agg({
+            "contagem": "sum", "soma": "sum", "soma_quadrados": "sum", "minimo": "min", "maximo": "max",
+        }).reset_index()
+        celulas_atuais, celulas_delta = nova_celula[:len(self.celulas)], nova_celula[len(self.celulas):]
+
+        chaves_cargo_pais = ["cargo", "residencia_iso3"] + self.dimensoes
+        cargo_pais = (
+            pd.concat([self.cargo_pais, delta.cargo_pais], ignore_index=True)
+            .groupby(chaves_cargo_pais, observed=True, sort=True)[["contagem", "soma"]]
+            .sum()
+            .reset_index()
+        )
+
+        # Valores novos fora das bordas descartam o histograma por célula
+        faixas = None
+        if self.faixas is not None and delta.faixas is not None:
+            faixas = np.zeros((len(celulas), self.faixas.shape[1]), dtype=self.faixas.dtype)
+            faixas[celulas_atuais] += self.faixas
+            faixas[celulas_delta] += delta.faixas
+
+        novo = copy.copy(self)
+        novo._montar(
+            celulas,
+            self.esbocos.combinar(delta.esbocos, celulas_atuais, celulas_delta, len(celulas)),
+            {
+                detalhe: tabela.combinar(delta.detalhes[detalhe], celulas_atuais, celulas_delta)
+                for detalhe, tabela in self.detalhes.items()
+            },
+            cargo_pais,
+            faixas,
+        )
+        return novo
+
+    def _mascara(self, tabela, selecoes):
+        """Máscara das linhas de uma tabela do cubo que atendem às seleções"""
+        mascara = np.ones(len(tabela), dtype=bool)
+        for dimensao, selecionados in selecoes.items():
+            mascara &= tabela[dimensao].isin(list(selecionados)).to_numpy()
+        return mascara
+
+    def _selecionar(self, tabela, selecoes):
+        """Linhas de uma tabela do cubo que atendem às seleções"""
+        return tabela[self._mascara(tabela, selecoes)]
+
+    def _mascara_celulas(self, selecoes):
+        """Máscara das células que atendem às seleções, via códigos por dimensão"""
+        mascara = np.ones(len(self.celulas), dtype=bool)
+        for dimensao, selecionados in selecoes.items():
+            selecionados = set(selecionados)
+            valores = self._listas_celulas[dimensao]
+            permitidos = np.fromiter((valor in selecionados for valor in valores), dtype=bool, count=len(valores))
+            mascara &= permitidos[self.codigos_celulas[dimensao]]
+        return mascara
+
+    def _somar_por(self, dimensao, mascara, coluna):
+        """Soma de uma coluna das células selecionadas por código de ``dimensao``"""
+        return np.bincount(
+            self.codigos_celulas[dimensao][mascara],
+            weights=self.colunas_celulas[coluna][mascara],
+            minlength=len(self.valores_celulas[dimensao]),
+        )
+
+    def totais(self, selecoes):
+        """Contagem, média, desvio padrão, mínimo e máximo do recorte"""
+        mascara = self._mascara_celulas(selecoes)
+        colunas = {coluna: valores[mascara] for coluna, valores in self.colunas_celulas.items()}
+        contagem = int(colunas["contagem"].sum())
+        if contagem == 0:
+            return {"contagem": 0, "media": np.nan, "desvio_padrao": np.nan,
+                    "minimo": np.nan, "maximo": np.nan}
+        soma = colunas["soma"].sum()
+        media = soma / contagem
+        variancia = max(colunas["soma_quadrados"].sum() / contagem - media * media, 0.0)
+        return {
+            "contagem": contagem,
+            "media": media,
+            "desvio_padrao": np.sqrt(variancia),
+            "minimo": colunas["minimo"].min(),
+            "maximo": colunas["maximo"].max(),
+        }
+
+    def percentis(self, selecoes, percentis):
+        """Percentis aproximados de ``usd`` no recorte, mesclando os esboços"""
+        return self.esbocos.quantis(self.esbocos.mesclar(self._mascara_celulas(selecoes)), percentis)
+
+    def percentis_por(self, dimensao, selecoes, percentis):
+        """Percentis aproximados por valor de uma dimensão de filtro
+
+        Os esboços das células selecionadas são somados por código da dimensão
+        numa matriz valor × balde, e os quantis saem de uma vez para todos os
+        valores.
+        """
+        mascara = self._mascara_celulas(selecoes)
+        codigos = self.codigos_celulas[dimensao][mascara]
+        por_valor = np.zeros(
+            (len(self.valores_celulas[dimensao]), self.esbocos.contagens.shape[1]), dtype=np.int64
+        )
+        np.add.at(por_valor, codigos, self.esbocos.contagens[mascara])
+        presentes = np.unique(codigos)
+        return pd.DataFrame(
+            self.esbocos.quantis_por_grupo(por_valor[presentes], percentis),
+            index=pd.Index(self.valores_celulas[dimensao][presentes].tolist(), name=dimensao),
+            columns=[f"p{p}" for p in percentis],
+        )
+
+    def tem_histograma(self, bordas):
+        """Se o cubo guarda as contagens por faixa exatamente nessas ``bordas``"""
+        return (
+            self.faixas is not None and bordas is not None
+            and np.array_equal(self.bordas_histograma, bordas)
+        )
+
+    def histograma(self, selecoes, bordas):
+        """Contagens por faixa do recorte somando as células, ou None
+
+        Só responde quando ``tem_histograma(bordas)``; caso contrário o
+        histograma precisa das linhas.
+        """
+        if not self.tem_histograma(bordas):
+            return None
+        return pd.DataFrame({
+            "inicio": bordas[:-1],
+            "fim": bordas[1:],
+            "quantidade": self.faixas[self._mascara_celulas(selecoes)].sum(axis=0),
+        })
+
+    def _rollup(self, dimensao, selecoes):
+        """Soma contagem e soma do recorte agrupando por ``dimensao``"""
+        mascara = self._mascara_celulas(selecoes)
+        if dimensao in self.dimensoes:
+            contagem = self._somar_por(dimensao, mascara, "contagem")
+            presentes = contagem > 0
+            return pd.DataFrame(
+                {
+                    "contagem": contagem[presentes].astype(np.int64),
+                    "soma": self._somar_por(dimensao, mascara, "soma")[presentes],
+                },
+                index=self.valores_celulas[dimensao][presentes],
+            )
+        detalhe = self.detalhes[dimensao]
+        contagem, soma = detalhe.somar(mascara)
+        presentes = contagem > 0
+        return pd.DataFrame(
+            {"contagem": contagem[presentes].astype(np.int64), "soma": soma[presentes]},
+            index=detalhe.categorias[presentes],
+        )
+
+    def contagens_facetas(self, selecoes):
+        """Linhas por valor de cada dimensão de filtro sob as demais seleções
+
+        Para cada dimensão, a própria seleção é ignorada: a contagem de um
+        valor é quantas linhas o recorte teria se ele fosse escolhido.
+        """
+        facetas = {}
+        for dimensao in self.dimensoes:
+            demais = {d: v for d, v in selecoes.items() if d != dimensao}
+            contagem = self._somar_por(dimensao, self._mascara_celulas(demais), "contagem")
+            presentes = contagem > 0
+            facetas[dimensao] = pd.Series(
+                contagem[presentes].astype(np.int64),
+                index=self.valores_celulas[dimensao][presentes],
+                name="contagem",
+            )
+        return facetas
+
+    def _somas_ranking(self, dimensao, selecoes):
+        """Contagem/soma exatas por valor de uma coluna de detalhe no recorte"""
+        return self.detalhes[dimensao].somar(self._mascara_celulas(selecoes))
+
+    def mais_frequente(self, dimensao, selecoes):
+        """Valor mais frequente no recorte (equivale a mode()[0]), ou None"""
+        contagem, _ = self._somas_ranking(dimensao, selecoes)
+        if not contagem.size or contagem.max() == 0:
+            return None
+        return self.detalhes[dimensao].categorias[int(np.argmax(contagem))]
+
+    def top_media(self, dimensao, selecoes, k):
+        """Os ``k`` valores de maior média de ``usd`` (equivale a mean().nlargest(k))"""
+        contagem, soma = self._somas_ranking(dimensao, selecoes)
+        presentes = np.flatnonzero(contagem > 0)
+        medias = soma[presentes] / contagem[presentes]
+        escolhidos = presentes[indices_top_k(medias, k)]
+        return pd.Series(
+            soma[escolhidos] / contagem[escolhidos],
+            index=self.detalhes[dimensao].categorias[escolhidos],
+            name="usd",
+        )
+
+    def media_por(self, dimensao, selecoes):
+        """Média de ``usd`` por valor de ``dimensao`` (equivale a groupby().mean())"""
+        agregado = self._rollup(dimensao, selecoes)
+        return (agregado["soma"] / agregado["contagem"]).rename("usd")
+
+    def media_por_pais_do_cargo(self, cargo, selecoes):
+        """Média de ``usd`` por país para um cargo, via fatia da tabela cargo × país"""
+        inicio, fim = self.intervalos_cargo.get(cargo, (0, 0))
+        agregado = (
+            self._selecionar(self.cargo_pais.iloc[inicio:fim], selecoes)
+            .groupby("residencia_iso3", observed=True)[["contagem", "soma"]]
+            .sum()
+        )
+        return (agregado["soma"] / agregado["contagem"]).rename("usd")
+
+    def contagem_por(self, dimensao, selecoes):
+        """Contagem por valor de ``dimensao`` (equivale a value_counts())"""
+        agregado = self._rollup(dimensao, selecoes)
+        return agregado["contagem"].sort_values(ascending=False, kind="stable").rename("count")
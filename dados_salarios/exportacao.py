@@ -0,0 +1,71 @@
+"""Exportação sob demanda das linhas filtradas, em blocos.
+
+Os arquivos são gerados bloco a bloco a partir dos ids das linhas, de modo que
+o pico de memória depende do tamanho do bloco e não do total exportado.
+``consumir`` lê o arquivo pronto uma única vez e o apaga do disco.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+TAMANHO_BLOCO = 50_000
+
+FORMATOS = {
+    "CSV": {"extensao": "csv", "mime": "text/csv"},
+    "Parquet": {"extensao": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def _blocos(df, linhas, tamanho_bloco):
+    """Gera fatias do DataFrame com no máximo ``tamanho_bloco`` linhas"""
+    ids = np.arange(len(df)) if linhas is None else linhas
+    for inicio in range(0, len(ids), tamanho_bloco):
+        yield df.take(ids[inicio:inicio + tamanho_bloco])
+
+
+def _csv_dos_blocos(modelo, blocos):
+    yield modelo.to_csv(index=False).encode("utf-8")
+    for bloco in blocos:
+        yield bloco.to_csv(index=False, header=False).encode("utf-8")
+
+
+def _parquet_dos_blocos(destino, modelo, blocos, esquema=None):
+    esquema = esquema or pa.Schema.from_pandas(modelo, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for bloco in blocos:
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+
+
+def exportar_blocos(formato, modelo, blocos, diretorio=None, esquema=None):
+    """Grava os DataFrames de ``blocos`` (colunas e tipos de ``modelo``) e retorna o caminho
+
+    Usado quando os blocos vêm de outra fonte que não um DataFrame em memória
+    (ex.: lotes lidos dos arquivos particionados); ``esquema`` fixa os tipos
+    do Parquet quando o modelo vazio não os determina.
+    """
+    extensao = FORMATOS[formato]["extensao"]
+    descritor, caminho = tempfile.mkstemp(prefix="dados_salarios_", suffix=f".{extensao}", dir=diretorio)
+    with os.fdopen(descritor, "wb") as destino:
+        if formato == "CSV":
+            for pedaco in _csv_dos_blocos(modelo, blocos):
+                destino.write(pedaco)
+        else:
+            _parquet_dos_blocos(destino, modelo, blocos, esquema)
+    return caminho
+
+
+def exportar(formato, df, linhas=None, diretorio=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o arquivo de exportação em disco e retorna seu caminho"""
+    return exportar_blocos(formato, df.iloc[:0], _blocos(df, linhas, tamanho_bloco), diretorio)
+
+
+def consumir(caminho):
+    """Conteúdo do arquivo de exportação, apagando-o do disco em seguida"""
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read()
+    finally:
+        os.remove(caminho)
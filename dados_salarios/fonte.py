@@ -0,0 +1,264 @@
+"""Camada de fonte de dados: snapshot colunar local do CSV de salários.
+
+O CSV remoto só é lido uma vez, para construir um snapshot Parquet versionado
+em disco. As execuções seguintes (e os demais processos) leem apenas o
+snapshot, com as colunas necessárias, sem acesso à rede.
+
+O snapshot registra até que byte do CSV foi lido e a impressão digital
+(SHA-256) do trecho final lido. ``sincronizar_snapshot`` compara essa
+impressão com a fonte: se o trecho não mudou, só os bytes novos (linhas
+completas anexadas) são lidos e gravados como uma parte extra do snapshot;
+qualquer outra mudança reconstrói o snapshot inteiro. As partes formam uma
+cadeia (cada uma começa no byte em que a anterior terminou) e são compactadas
+no arquivo base a cada ``PARTES_MAXIMAS`` anexações.
+
+Configuração por variáveis de ambiente:
+
+- ``DASHBOARD_SNAPSHOT``: caminho completo do arquivo de snapshot.
+- ``DASHBOARD_SNAPSHOT_DIR``: diretório do snapshot (padrão: ``./dados``).
+- ``DASHBOARD_FONTE_CSV``: URL ou caminho do CSV de origem.
+- ``DASHBOARD_FONTE_TIMEOUT_S``: tempo máximo de espera da URL por operação de
+  rede (padrão: 30 s); ao vencer, a leitura falha como uma fonte inacessível.
+"""
+import hashlib
+import io
+import os
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+URL_CSV = "https://raw.githubusercontent.com/vqrca/dashboard_salarios_dados/refs/heads/main/dados-imersao-final.csv"
+
+# Incrementar quando o formato do snapshot mudar: força a reconstrução
+VERSAO_SNAPSHOT = 2
+
+DIRETORIO_PADRAO = Path(__file__).resolve().parent.parent / "dados"
+
+COLUNAS_PAINEL = [
+    "ano", "senioridade", "contrato", "cargo", "salario", "moeda", "usd",
+    "residencia", "remoto", "empresa", "tamanho_empresa", "residencia_iso3",
+]
+
+# Bytes finais já lidos cuja impressão digital identifica a fonte
+JANELA_IMPRESSAO = 64 * 1024
+
+# Partes anexadas antes de compactar tudo no arquivo base
+PARTES_MAXIMAS = 32
+
+PREFIXO_METADADOS = b"dados_salarios."
+
+TIMEOUT_PADRAO_S = 30
+
+
+def fonte_csv():
+    """Retorna a URL (ou caminho) do CSV de origem"""
+    return os.environ.get("DASHBOARD_FONTE_CSV", URL_CSV)
+
+
+def timeout_fonte():
+    """Segundos de espera por operação de rede ao ler a URL (DASHBOARD_FONTE_TIMEOUT_S)"""
+    return float(os.environ.get("DASHBOARD_FONTE_TIMEOUT_S", TIMEOUT_PADRAO_S))
+
+
+def caminho_snapshot():
+    """Retorna o caminho do snapshot local para a versão atual"""
+    caminho = os.environ.get("DASHBOARD_SNAPSHOT")
+    if caminho:
+        return Path(caminho)
+    diretorio = Path(os.environ.get("DASHBOARD_SNAPSHOT_DIR", DIRETORIO_PADRAO))
+    return diretorio / f"salarios_v{VERSAO_SNAPSHOT}.parquet"
+
+
+def _eh_url(origem):
+    return str(origem).startswith(("http://", "https://"))
+
+
+def _ler_bytes(origem, inicio=0):
+    """Bytes da origem a partir de ``inicio`` (com Range em URLs, se suportado)"""
+    if not _eh_url(origem):
+        with open(origem, "rb") as arquivo:
+            arquivo.seek(inicio)
+            return arquivo.read()
+
+    cabecalhos = {"Range": f"bytes={inicio}-"} if inicio else {}
+    try:
+        requisicao = urllib.request.Request(origem, headers=cabecalhos)
+        with urllib.request.urlopen(requisicao, timeout=timeout_fonte()) as resposta:
+            conteudo = resposta.read()
+            # Servidor sem suporte a Range devolve o arquivo inteiro
+            return conteudo[inicio:] if inicio and resposta.status != 206 else conteudo
+    except urllib.error.HTTPError as erro:
+        if erro.code == 416:  # Range além do fim: nada novo
+            return b""
+        raise
+
+
+def _impressao(conteudo):
+    """SHA-256 dos últimos ``JANELA_IMPRESSAO`` bytes lidos"""
+    return hashlib.sha256(conteudo[-JANELA_IMPRESSAO:]).hexdigest()
+
+
+def _mtime(origem):
+    return "" if _eh_url(origem) else str(os.stat(origem).st_mtime_ns)
+
+
+def _metadados(caminho):
+    """Metadados do snapshot (sem o prefixo), como strings"""
+    metadados = pq.read_schema(caminho).metadata or {}
+    return {
+        chave[len(PREFIXO_METADADOS):].decode(): valor.decode()
+        for chave, valor in metadados.items()
+        if chave.startswith(PREFIXO_METADADOS)
+    }
+
+
+def _gravar(tabela, caminho, metadados):
+    """Grava uma tabela Parquet com os metadados do snapshot, de forma atômica"""
+    esquema = dict(tabela.schema.metadata or {})
+    esquema.update({PREFIXO_METADADOS + chave.encode(): str(valor).encode() for chave, valor in metadados.items()})
+    tabela = tabela.replace_schema_metadata(esquema)
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(caminho.name + f".{os.getpid()}.tmp")
+    pq.write_table(tabela, temporario, compression="zstd")
+    os.replace(temporario, caminho)
+
+
+def _partes(caminho):
+    return sorted(caminho.parent.glob(f"{caminho.stem}.parte-*.parquet"))
+
+
+def _cadeia(caminho):
+    """Arquivos válidos do snapshot (base e partes encadeadas) e o estado final"""
+    arquivos = [caminho]
+    estado = _metadados(caminho)
+    for parte in _partes(caminho):
+        metadados = _metadados(parte)
+        # Partes que não continuam a anterior são restos de uma reconstrução
+        if metadados.get("bytes_inicio") != estado.get("bytes_lidos"):
+            break
+        arquivos.append(parte)
+        estado = metadados
+    return arquivos, estado
+
+
+def construir_snapshot(caminho=None, origem=None):
+    """Lê o CSV de origem e grava o snapshot Parquet de forma atômica"""
+    caminho = Path(caminho or caminho_snapshot())
+    origem = origem or fonte_csv()
+    mtime = _mtime(origem)
+    conteudo = _ler_bytes(origem)
+    df = pd.read_csv(io.BytesIO(conteudo))
+
+    _gravar(pa.Table.from_pandas(df, preserve_index=False), caminho, {
+        "versao": VERSAO_SNAPSHOT,
+        "origem": origem,
+        "bytes_lidos": len(conteudo),
+        "impressao": _impressao(conteudo),
+        "mtime": mtime,
+    })
+    for parte in _partes(caminho):
+        parte.unlink(missing_ok=True)
+    return caminho
+
+
+def _compactar(caminho):
+    """Junta base e partes em um novo arquivo base"""
+    arquivos, estado = _cadeia(caminho)
+    tabela = pa.concat_tables([pq.read_table(arquivo) for arquivo in arquivos])
+    estado.pop("bytes_inicio", None)
+    _gravar(tabela, caminho, estado)
+    for parte in _partes(caminho):
+        parte.unlink(missing_ok=True)
+
+
+def sincronizar_snapshot(caminho=None, origem=None):
+    """Leva o snapshot ao estado atual da fonte
+
+    Retorna ``(modo, novas)``: ``"inalterado"``, ``"anexado"`` (``novas``
+    traz só as linhas anexadas) ou ``"reconstruido"`` (``novas`` é None).
+    """
+    caminho = Path(caminho or caminho_snapshot())
+    origem = origem or fonte_csv()
+    if not caminho.exists():
+        construir_snapshot(caminho, origem)
+        return "reconstruido", None
+
+    arquivos, estado = _cadeia(caminho)
+    if estado.get("origem") != str(origem) or "bytes_lidos" not in estado:
+        construir_snapshot(caminho, origem)
+        return "reconstruido", None
+
+    lidos = int(estado["bytes_lidos"])
+    mtime = _mtime(origem)
+    if mtime and mtime == estado.get("mtime") and os.path.getsize(origem) == lidos:
+        return "inalterado", None
+
+    # Relê o trecho final já lido (para conferir a impressão) e o que veio depois
+    inicio = max(lidos - JANELA_IMPRESSAO, 0)
+    conteudo = _ler_bytes(origem, inicio)
+    janela, novos = conteudo[:lidos - inicio], conteudo[lidos - inicio:]
+    if len(janela) < lidos - inicio or _impressao(janela) != estado["impressao"]:
+        construir_snapshot(caminho, origem)
+        return "reconstruido", None
+
+    # Só linhas completas; uma linha ainda sendo escrita fica para a próxima vez
+    fim = novos.rfind(b"\n") + 1
+    if fim == 0:
+        return "inalterado", None
+    esquema = pq.read_schema(caminho).remove_metadata()
+    novas = pd.read_csv(io.BytesIO(novos[:fim]), header=None, names=esquema.names)
+    try:
+        tabela = pa.Table.from_pandas(novas, preserve_index=False).cast(esquema)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Linhas novas incompatíveis com o esquema do snapshot
+        construir_snapshot(caminho, origem)
+        return "reconstruido", None
+
+    parte = caminho.with_name(f"{caminho.stem}.parte-{len(arquivos):05d}.parquet")
+    _gravar(tabela, parte, {
+        "versao": VERSAO_SNAPSHOT,
+        "origem": origem,
+        "bytes_inicio": lidos,
+        "bytes_lidos": lidos + fim,
+        "impressao": _impressao(janela + novos[:fim]),
+        "mtime": mtime,
+    })
+    if len(arquivos) >= PARTES_MAXIMAS:
+        _compactar(caminho)
+    return "anexado", tabela.to_pandas()
+
+
+def estado_snapshot(caminho=None):
+    """Estado da fonte registrado no snapshot (origem, bytes lidos, impressão)"""
+    caminho = Path(caminho or caminho_snapshot())
+    if not caminho.exists():
+        construir_snapshot(caminho)
+    return _cadeia(caminho)[1]
+
+
+def arquivos_snapshot(caminho=None):
+    """Arquivos Parquet do snapshot (base e partes), construindo-o se não existir"""
+    caminho = Path(caminho or caminho_snapshot())
+    if not caminho.exists():
+        construir_snapshot(caminho)
+    return _cadeia(caminho)[0]
+
+
+def carregar_dados(colunas=COLUNAS_PAINEL):
+    """Carrega o snapshot local, construindo-o a partir do CSV se não existir"""
+    caminho = caminho_snapshot()
+    if not caminho.exists():
+        construir_snapshot(caminho)
+
+    if colunas is not None:
+        disponiveis = set(pq.read_schema(caminho).names)
+        colunas = [coluna for coluna in colunas if coluna in disponiveis]
+    arquivos, _ = _cadeia(caminho)
+    if len(arquivos) == 1:
+        return pd.read_parquet(caminho, columns=colunas)
+    return pd.concat([pd.read_parquet(arquivo, columns=colunas) for arquivo in arquivos], ignore_index=True)
@@ -0,0 +1,16 @@
+"""Rankings (mais frequente e top-k) sem ordenar o vocabulário inteiro.
+
+``indices_top_k`` usa seleção parcial (``np.argpartition``): só os k
+escolhidos são ordenados.
+"""
+import numpy as np
+
+
+def indices_top_k(valores, k):
+    """Posições dos ``k`` maiores valores, em ordem decrescente"""
+    k = min(k, len(valores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    escolhidos = np.argpartition(-valores, k - 1)[:k]
+    return escolhidos[np.lexsort((escolhidos, -valores[escolhidos]))]
+
@@ -0,0 +1,314 @@
+"""Construção das figuras Plotly do painel e cache de figuras por conteúdo.
+
+Cada função ``figura_*`` recebe só o agregado que o gráfico exibe (nunca as
+linhas) e os parâmetros de estilo. ``CacheFiguras`` guarda a ``go.Figure``
+pronta sob o hash desse agregado mais o estilo: se o agregado não mudou entre
+reruns, a figura não é reconstruída nem revalidada (``st.plotly_chart`` só a
+serializa). O orçamento conta o tamanho do JSON de cada figura. Com uma
+medição ligada (``instrumentacao``), cada figura registra sua etapa com esse
+tamanho.
+"""
+import hashlib
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .agregacao import SEGMENTOS
+from .cache import CacheLRU
+from .instrumentacao import MEDICAO_NULA
+
+# Cor de cada segmento nas figuras de comparação
+CORES_SEGMENTOS = dict(zip(SEGMENTOS, ["#1f77b4", "#ff7f0e"]))
+
+
+def figura_top_cargos(top_cargos, escala_cores="Blues", altura=400):
+    """Barras horizontais com o salário médio dos cargos mais bem pagos"""
+    dados = top_cargos.sort_values(ascending=True).reset_index()
+    figura = px.bar(
+        dados,
+        x='usd',
+        y='cargo',
+        orientation='h',
+        labels={'usd': 'Salário Médio Anual (USD)', 'cargo': 'Cargo'},
+        color='usd',
+        color_continuous_scale=escala_cores
+    )
+    figura.update_layout(
+        showlegend=False,
+        yaxis={'categoryorder': 'total ascending'},
+        height=altura,
+        hovermode='closest'
+    )
+    figura.update_traces(
+        hovertemplate='<b>%{y}</b><br>Salário: $%{x:,.0f}<extra></extra>'
+    )
+    return figura
+
+
+def figura_media_senioridade(media_por_senioridade, escala_cores="Greens", altura=400):
+    """Barras com o salário médio por senioridade"""
+    figura = px.bar(
+        media_por_senioridade.reset_index(),
+        x='senioridade',
+        y='usd',
+        labels={'usd': 'Salário Médio (USD)', 'senioridade': 'Nível'},
+        color='usd',
+        color_continuous_scale=escala_cores
+    )
+    figura.update_layout(
+        showlegend=False,
+        height=altura
+    )
+    figura.update_traces(
+        hovertemplate='<b>%{x}</b><br>Salário: $%{y:,.0f}<extra></extra>'
+    )
+    return figura
+
+
+def figura_evolucao_ano(evolucao_ano, cor="#1f77b4", altura=350):
+    """Linha com a evolução do salário médio por ano e a faixa P25-P75
+
+    ``evolucao_ano`` é indexado por ano, com a coluna ``usd`` (média) e,
+    opcionalmente, ``p25``/``p75``.
+    """
+    dados = evolucao_ano.reset_index()
+    figura = px.line(
+        dados,
+        x='ano',
+        y='usd',
+        markers=True,
+        labels={'usd': 'Salário Médio (USD)', 'ano': 'Ano'}
+    )
+    figura.update_traces(
+        line_color=cor,
+        line_width=3,
+        marker=dict(size=10),
+        hovertemplate='<b>Ano %{x}</b><br>Salário: $%{y:,.0f}<extra></extra>'
+    )
+    if {'p25', 'p75'}.issubset(dados.columns):
+        figura.add_trace(go.Scatter(
+            x=dados['ano'], y=dados['p75'], mode='lines', line_width=0,
+            name='P75', hovertemplate='P75: $%{y:,.0f}<extra></extra>'
+        ))
+        figura.add_trace(go.Scatter(
+            x=dados['ano'], y=dados['p25'], mode='lines', line_width=0,
+            fill='tonexty', fillcolor='rgba(31, 119, 180, 0.15)',
+            name='P25', hovertemplate='P25: $%{y:,.0f}<extra></extra>'
+        ))
+    figura.update_layout(height=altura, showlegend=False, hovermode='x unified')
+    return figura
+
+
+def figura_mapa_paises(media_por_pais, escala_cores="RdYlGn", altura=500):
+    """Mapa coroplético com o salário médio por país"""
+    figura = px.choropleth(
+        media_por_pais.reset_index(),
+        locations='residencia_iso3',
+        color='usd',
+        color_continuous_scale=escala_cores,
+        labels={'usd': 'Salário Médio (USD)', 'residencia_iso3': 'País'},
+        hover_data={'usd': ':,.0f'}
+    )
+    figura.update_layout(
+        height=altura,
+        geo=dict(showframe=False, showcoastlines=True)
+    )
+    return figura
+
+
+def figura_top_paises(top_paises, escala_cores="Viridis", altura=500):
+    """Barras horizontais com os países de maior salário médio"""
+    figura = px.bar(
+        top_paises.sort_values(ascending=True).reset_index(),
+        x='usd',
+        y='residencia_iso3',
+        orientation='h',
+        labels={'usd': 'Salário Médio (USD)', 'residencia_iso3': 'País'},
+        color='usd',
+        color_continuous_scale=escala_cores
+    )
+    figura.update_layout(
+        showlegend=False,
+        height=altura
+    )
+    figura.update_traces(
+        hovertemplate='<b>%{y}</b><br>Salário: $%{x:,.0f}<extra></extra>'
+    )
+    return figura
+
+
+def figura_histograma(histograma, cor="#1f77b4", altura=400):
+    """Histograma a partir das contagens por faixa calculadas no servidor"""
+    figura = go.Figure(go.Bar(
+        x=(histograma['inicio'] + histograma['fim']) / 2,
+        y=histograma['quantidade'],
+        width=histograma['fim'] - histograma['inicio'],
+        customdata=histograma[['inicio', 'fim']],
+        marker_color=cor
+    ))
+    figura.update_layout(
+        showlegend=False,
+        height=altura,
+        bargap=0,
+        xaxis_title='Salário Anual (USD)',
+        yaxis_title='Frequência'
+    )
+    figura.update_traces(
+        hovertemplate='Faixa: $%{customdata[0]:,.0f} - $%{customdata[1]:,.0f}<br>Quantidade: %{y}<extra></extra>'
+    )
+    return figura
+
+
+def figura_tipos_trabalho(contagem_remoto, altura=400):
+    """Rosca com a proporção dos tipos de trabalho"""
+    dados = contagem_remoto.reset_index()
+    dados.columns = ['tipo_trabalho', 'quantidade']
+    figura = px.pie(
+        dados,
+        names='tipo_trabalho',
+        values='quantidade',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    figura.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
+    )
+    figura.update_layout(height=altura)
+    return figura
+
+
+def figura_tamanho_empresa(contagem_tamanho, escala_cores="Blues", altura=350):
+    """Barras com o número de registros por tamanho de empresa"""
+    dados = contagem_tamanho.reset_index()
+    dados.columns = ['tamanho', 'quantidade']
+    figura = px.bar(
+        dados,
+        x='tamanho',
+        y='quantidade',
+        labels={'tamanho': 'Tamanho da Empresa', 'quantidade': 'Número de Registros'},
+        color='quantidade',
+        color_continuous_scale=escala_cores
+    )
+    figura.update_layout(showlegend=False, height=altura)
+    return figura
+
+
+def figura_top_cargos_comparacao(top_cargos, altura=500):
+    """Barras horizontais agrupadas com o salário médio dos top cargos de cada segmento
+
+    ``top_cargos`` é indexado por cargo, com uma coluna por segmento (NaN
+    quando o cargo não está no top daquele segmento).
+    """
+    dados = top_cargos.loc[top_cargos.max(axis=1).sort_values().index]
+    figura = go.Figure([
+        go.Bar(
+            x=dados[segmento], y=dados.index, orientation='h', name=f'Segmento {segmento}',
+            marker_color=cor, hovertemplate='<b>%{y}</b><br>Salário: $%{x:,.0f}<extra>%{fullData.name}</extra>'
+        )
+        for segmento, cor in CORES_SEGMENTOS.items()
+    ])
+    figura.update_layout(
+        barmode='group',
+        height=altura,
+        xaxis_title='Salário Médio Anual (USD)',
+        yaxis_title='Cargo',
+        legend=dict(orientation='h', y=1.08)
+    )
+    return figura
+
+
+def figura_evolucao_comparacao(evolucao_ano, altura=350):
+    """Linhas com a evolução do salário médio por ano de cada segmento"""
+    figura = go.Figure([
+        go.Scatter(
+            x=evolucao_ano.index, y=evolucao_ano[segmento], mode='lines+markers', name=f'Segmento {segmento}',
+            line=dict(color=cor, width=3), marker=dict(size=10),
+            hovertemplate='Salário: $%{y:,.0f}<extra>%{fullData.name}</extra>'
+        )
+        for segmento, cor in CORES_SEGMENTOS.items()
+    ])
+    figura.update_layout(
+        height=altura,
+        hovermode='x unified',
+        xaxis=dict(title='Ano', tickmode='array', tickvals=list(evolucao_ano.index)),
+        yaxis_title='Salário Médio (USD)',
+        legend=dict(orientation='h', y=1.1)
+    )
+    return figura
+
+
+def figura_histograma_comparacao(histograma, altura=400):
+    """Histogramas sobrepostos dos segmentos, nas mesmas faixas"""
+    centros = (histograma['inicio'] + histograma['fim']) / 2
+    figura = go.Figure([
+        go.Bar(
+            x=centros, y=histograma[segmento], width=histograma['fim'] - histograma['inicio'],
+            customdata=histograma[['inicio', 'fim']], name=f'Segmento {segmento}', marker_color=cor, opacity=0.55,
+            hovertemplate='Faixa: $%{customdata[0]:,.0f} - $%{customdata[1]:,.0f}<br>'
+                          'Quantidade: %{y}<extra>%{fullData.name}</extra>'
+        )
+        for segmento, cor in CORES_SEGMENTOS.items()
+    ])
+    figura.update_layout(
+        barmode='overlay',
+        bargap=0,
+        height=altura,
+        xaxis_title='Salário Anual (USD)',
+        yaxis_title='Frequência',
+        legend=dict(orientation='h', y=1.1)
+    )
+    return figura
+
+
+def figuras_do_resultado(resultado):
+    """Construtores e entradas das figuras que o painel monta a partir de um resultado"""
+    return [
+        (figura_top_cargos, resultado.top_cargos),
+        (figura_media_senioridade, resultado.media_por_senioridade),
+        (figura_evolucao_ano, resultado.evolucao_anual()),
+        (figura_top_paises, resultado.top_paises),
+        (figura_histograma, resultado.histograma),
+        (figura_tipos_trabalho, resultado.contagem_remoto),
+        (figura_tamanho_empresa, resultado.contagem_tamanho),
+    ]
+
+
+def hash_conteudo(dados, estilo=None):
+    """Hash estável do conteúdo de um agregado (valores, índice e nomes) e do estilo"""
+    resumo = hashlib.sha1()
+    if isinstance(dados, (pd.Series, pd.DataFrame)):
+        resumo.update(pd.util.hash_pandas_object(dados, index=True).to_numpy().tobytes())
+        nomes = dados.columns.tolist() if isinstance(dados, pd.DataFrame) else [dados.name]
+        resumo.update(repr((nomes, dados.index.names, str(dados.dtypes))).encode())
+    else:
+        resumo.update(repr(dados).encode())
+    resumo.update(repr(sorted((estilo or {}).items())).encode())
+    return resumo.hexdigest()
+
+
+def _montar(construtor, dados, estilo):
+    """Figura e o tamanho do seu JSON (medido uma vez, para o orçamento do cache)"""
+    figura = construtor(dados, **estilo)
+    return figura, len(figura.to_json())
+
+
+class CacheFiguras:
+    """Cache LRU de objetos ``go.Figure``, chaveado pelo conteúdo
+
+    As figuras guardadas são compartilhadas entre sessões e não devem ser
+    alteradas por quem as recebe.
+    """
+
+    def __init__(self, orcamento_bytes):
+        self.cache = CacheLRU(orcamento_bytes, tamanho_de=lambda entrada: entrada[1])
+
+    def figura(self, construtor, dados, medicao=MEDICAO_NULA, **estilo):
+        """Figura montada por ``construtor(dados, **estilo)``"""
+        with medicao.etapa(f"grafico:{construtor.__name__}", linhas=len(dados)) as registro:
+            chave = (construtor.__name__, hash_conteudo(dados, estilo))
+            figura, tamanho = self.cache.obter_ou_calcular(chave, lambda: _montar(construtor, dados, estilo))
+            registro["bytes"] = tamanho
+            return figura
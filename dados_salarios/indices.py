@@ -0,0 +1,194 @@
+"""Índices pré-computados sobre o DataFrame de salários.
+
+``IndiceBitmap`` guarda, para cada dimensão de filtro da barra lateral, um
+bitmap por valor (bits empacotados em palavras de 64 bits). Um filtro vira a
+união dos bitmaps dos valores selecionados dentro de cada dimensão e a
+interseção entre dimensões; dimensões com todos os valores selecionados não
+custam nada.
+
+``IndiceOrdenado`` guarda a permutação que ordena uma coluna numérica
+(``usd``): um intervalo vira duas buscas binárias e uma fatia da permutação.
+
+``OrdenacoesColunas`` guarda a permutação de ordenação de cada coluna exibida
+na tabela detalhada, calculada uma vez por conjunto de dados.
+
+``anexar`` devolve um novo índice com linhas acrescentadas ao fim, a um custo
+proporcional às linhas novas (mais a cópia dos vetores existentes); o índice
+original não é alterado e continua válido para quem ainda o usa.
+"""
+import copy
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES_FILTRO = ["ano", "senioridade", "contrato", "tamanho_empresa"]
+
+
+def _empacotar(mascara):
+    """Empacota uma máscara booleana em um bitmap de palavras uint64"""
+    bits = np.packbits(mascara, bitorder="little")
+    sobra = (-len(bits)) % 8
+    if sobra:
+        bits = np.concatenate([bits, np.zeros(sobra, dtype=np.uint8)])
+    return bits.view(np.uint64)
+
+
+class IndiceBitmap:
+    """Índice invertido valor -> bitmap de linhas para as dimensões de filtro"""
+
+    def __init__(self, df, dimensoes=DIMENSOES_FILTRO):
+        self.n_linhas = len(df)
+        self.n_palavras = (self.n_linhas + 63) // 64
+        self.bitmaps = {}
+        for dimensao in dimensoes:
+            codigos, valores = pd.factorize(df[dimensao], sort=True)
+            self.bitmaps[dimensao] = {
+                valor: _empacotar(codigos == i)
+                for i, valor in enumerate(valores.tolist())
+            }
+
+    @classmethod
+    def de_bitmaps(cls, n_linhas, bitmaps):
+        """Índice a partir de bitmaps já construídos (ex.: mapeados de um arquivo)"""
+        indice = cls.__new__(cls)
+        indice.n_linhas = n_linhas
+        indice.n_palavras = (n_linhas + 63) // 64
+        indice.bitmaps = bitmaps
+        return indice
+
+    def anexar(self, novas):
+        """Novo índice com as linhas de ``novas`` acrescentadas ao fim"""
+        novo = copy.copy(self)
+        novo.n_linhas = self.n_linhas + len(novas)
+        novo.n_palavras = (novo.n_linhas + 63) // 64
+        novo.bitmaps = {}
+        for dimensao, bitmaps in self.bitmaps.items():
+            codigos, valores = pd.factorize(novas[dimensao], sort=True)
+            posicao_nova = {valor: i for i, valor in enumerate(valores.tolist())}
+            novo.bitmaps[dimensao] = {}
+            for valor in sorted(set(bitmaps) | set(posicao_nova)):
+                bitmap = novo.vazio()
+                antigo = bitmaps.get(valor)
+                if antigo is not None:
+                    bitmap[:len(antigo)] = antigo
+                if valor in posicao_nova:
+                    linhas = self.n_linhas + np.flatnonzero(codigos == posicao_nova[valor])
+                    bits = np.left_shift(np.uint64(1), (linhas & 63).astype(np.uint64))
+                    np.bitwise_or.at(bitmap, linhas >> 6, bits)
+                novo.bitmaps[dimensao][valor] = bitmap
+        return novo
+
+    def valores(self, dimensao):
+        """Valores distintos (ordenados) de uma dimensão"""
+        return list(self.bitmaps[dimensao])
+
+    def vazio(self):
+        """Bitmap sem nenhuma linha"""
+        return np.zeros(self.n_palavras, dtype=np.uint64)
+
+    def selecionar(self, selecoes):
+        """Bitmap das linhas que atendem às seleções, ou None se nenhuma restringe
+
+        ``selecoes`` mapeia dimensão -> valores selecionados.
+        """
+        resultado = None
+        for dimensao, selecionados in selecoes.items():
+            bitmaps = self.bitmaps[dimensao]
+            selecionados = set(selecionados)
+            if selecionados.issuperset(bitmaps):
+                continue
+
+            uniao = self.vazio()
+            for valor in selecionados:
+                bitmap = bitmaps.get(valor)
+                if bitmap is not None:
+                    np.bitwise_or(uniao, bitmap, out=uniao)
+
+            if resultado is None:
+                resultado = uniao
+            else:
+                np.bitwise_and(resultado, uniao, out=resultado)
+        return resultado
+
+    def contem(self, bitmap, linhas):
+        """Máscara indicando quais ``linhas`` (ids) estão ligadas no bitmap"""
+        palavras = bitmap[linhas >> 6]
+        return ((palavras >> (linhas & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+    def para_mascara(self, bitmap):
+        """Converte um bitmap em máscara booleana com uma posição por linha"""
+        bits = np.unpackbits(bitmap.view(np.uint8), count=self.n_linhas, bitorder="little")
+        return bits.view(bool)
+
+
+class IndiceOrdenado:
+    """Permutação ordenada de uma coluna numérica com mínimo e máximo prontos"""
+
+    def __init__(self, serie):
+        valores = serie.to_numpy()
+        ordem = np.argsort(valores, kind="stable")
+        self._definir(ordem, valores[ordem])
+
+    @classmethod
+    def de_ordem(cls, ordem, valores_ordenados):
+        """Índice a partir de uma permutação já calculada"""
+        indice = cls.__new__(cls)
+        indice._definir(ordem, valores_ordenados)
+        return indice
+
+    def _definir(self, ordem, valores_ordenados):
+        self.ordem = ordem
+        self.valores_ordenados = valores_ordenados
+        # Limites inteiros usados pelo slider da barra lateral
+        self.minimo = math.floor(valores_ordenados[0]) if len(valores_ordenados) else 0
+        self.maximo = math.ceil(valores_ordenados[-1]) if len(valores_ordenados) else 0
+
+    def anexar(self, serie):
+        """Novo índice com os valores de ``serie`` como linhas acrescentadas ao fim
+
+        Os valores novos são ordenados e intercalados na permutação existente;
+        em empates ficam depois dos antigos, como na ordenação estável.
+        """
+        valores = serie.to_numpy()
+        ordem_novos = np.argsort(valores, kind="stable")
+        novos_ordenados = valores[ordem_novos]
+        tipo = np.result_type(self.valores_ordenados, novos_ordenados)
+        posicoes = np.searchsorted(self.valores_ordenados, novos_ordenados, side="right")
+
+        return IndiceOrdenado.de_ordem(
+            np.insert(self.ordem, posicoes, len(self.ordem) + ordem_novos),
+            np.insert(self.valores_ordenados.astype(tipo, copy=False), posicoes, novos_ordenados),
+        )
+
+    def cobre_tudo(self, inicio, fim):
+        """Indica se o intervalo [inicio, fim] inclui todos os valores"""
+        return inicio <= self.minimo and fim >= self.maximo
+
+    def linhas_no_intervalo(self, inicio, fim):
+        """Ids das linhas com valor em [inicio, fim], via busca binária"""
+        primeiro = np.searchsorted(self.valores_ordenados, inicio, side="left")
+        ultimo = np.searchsorted(self.valores_ordenados, fim, side="right")
+        return self.ordem[primeiro:ultimo]
+
+
+class OrdenacoesColunas:
+    """Permutações de ordenação por coluna, calculadas uma vez e memorizadas"""
+
+    def __init__(self, df, conhecidas=None):
+        self.df = df
+        self._ordens = dict(conhecidas or {})
+        self._lock = threading.Lock()
+
+    def ordem(self, coluna):
+        """Ids das linhas em ordem crescente (estável) da coluna"""
+        with self._lock:
+            if coluna not in self._ordens:
+                serie = self.df[coluna]
+                if isinstance(serie.dtype, pd.CategoricalDtype):
+                    valores = serie.cat.codes.to_numpy()
+                else:
+                    valores = serie.to_numpy()
+                self._ordens[coluna] = np.argsort(valores, kind="stable")
+            return self._ordens[coluna]
@@ -0,0 +1,220 @@
+"""Instrumentação das etapas de cada rerun do painel.
+
+``Instrumentacao`` é criada uma vez por processo. Cada rerun pede uma
+``MedicaoRerun`` e envolve suas etapas em ``with medicao.etapa(nome)`` ou
+marca o fim de um trecho com ``medicao.marco(nome)`` (duração desde o marco
+ou etapa anterior); o registro aceita ``linhas`` e ``bytes`` (payload de um
+gráfico). Ao fim do rerun, ``registrar`` acumula os totais por etapa,
+escreve uma linha JSON no logger ``dados_salarios.instrumentacao`` e, se
+configurado, reescreve o arquivo de métricas no formato texto do Prometheus
+e/ou o serve em ``/metrics`` numa porta local.
+
+Desligada (padrão), ``rerun`` devolve ``MEDICAO_NULA``: cada etapa vira um
+``nullcontext`` já pronto, sem relógio, lock nem alocação por chamada.
+
+Configuração por variáveis de ambiente:
+
+- ``DASHBOARD_INSTRUMENTACAO``: ``1`` liga a instrumentação e o painel de
+  depuração na barra lateral.
+- ``DASHBOARD_PROMETHEUS_ARQUIVO``: arquivo ``.prom`` reescrito a cada rerun
+  (para o coletor de arquivos de texto do node_exporter, por exemplo).
+- ``DASHBOARD_PROMETHEUS_PORTA``: porta local que serve ``/metrics``.
+- ``DASHBOARD_INSTRUMENTACAO_LOG``: arquivo dos logs JSON (padrão: stderr).
+"""
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos baldes do histograma de duração das etapas
+BALDES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class MedicaoNula:
+    """Medição desligada: as etapas não medem nada"""
+
+    habilitada = False
+    etapas = ()
+
+    def __init__(self):
+        self._nulo = contextlib.nullcontext({})
+
+    def etapa(self, nome, **atributos):
+        return self._nulo
+
+    def marco(self, nome, **atributos):
+        pass
+
+
+MEDICAO_NULA = MedicaoNula()
+
+
+class MedicaoRerun:
+    """Etapas medidas em um rerun: nome, duração e atributos (linhas, bytes)"""
+
+    habilitada = True
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self._ultimo = self.inicio
+        self.etapas = []
+
+    @contextlib.contextmanager
+    def etapa(self, nome, **atributos):
+        """Mede o bloco; o dicionário devolvido recebe atributos extras"""
+        registro = {"etapa": nome, **atributos}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            self._ultimo = time.perf_counter()
+            registro["segundos"] = self._ultimo - inicio
+            self.etapas.append(registro)
+
+    def marco(self, nome, **atributos):
+        """Registra como etapa o trecho desde o marco (ou etapa) anterior"""
+        agora = time.perf_counter()
+        self.etapas.append({"etapa": nome, **atributos, "segundos": agora - self._ultimo})
+        self._ultimo = agora
+
+    def total_segundos(self):
+        return time.perf_counter() - self.inicio
+
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentacao:
+    """Totais por etapa do processo, com log JSON e exportação Prometheus"""
+
+    def __init__(self, habilitada=False, arquivo_prometheus=None, porta_prometheus=None):
+        self.habilitada = habilitada
+        self.arquivo_prometheus = Path(arquivo_prometheus) if arquivo_prometheus else None
+        self._lock = threading.Lock()
+        self._reruns = 0
+        # etapa -> {"contagem", "segundos", "baldes", "linhas", "bytes"}
+        self._etapas = {}
+        self._servidor = None
+        if habilitada and porta_prometheus:
+            self._servir(int(porta_prometheus))
+
+    def rerun(self):
+        """Nova medição para um rerun (``MEDICAO_NULA`` se desligada)"""
+        return MedicaoRerun() if self.habilitada else MEDICAO_NULA
+
+    def registrar(self, medicao, **contexto):
+        """Acumula as etapas do rerun, registra o log JSON e atualiza o Prometheus"""
+        if not medicao.habilitada:
+            return
+        total = medicao.total_segundos()
+        with self._lock:
+            self._reruns += 1
+            for registro in medicao.etapas:
+                totais = self._etapas.setdefault(registro["etapa"], {
+                    "contagem": 0, "segundos": 0.0, "baldes": [0] * len(BALDES_SEGUNDOS),
+                    "linhas": 0, "bytes": 0,
+                })
+                totais["contagem"] += 1
+                totais["segundos"] += registro["segundos"]
+                for i, limite in enumerate(BALDES_SEGUNDOS):
+                    if registro["segundos"] <= limite:
+                        totais["baldes"][i] += 1
+                totais["linhas"] = registro.get("linhas", totais["linhas"])
+                totais["bytes"] = registro.get("bytes", totais["bytes"])
+            texto = self.texto_prometheus() if self.arquivo_prometheus else None
+
+        logger.info(json.dumps(
+            {"evento": "rerun", "segundos": total, **contexto, "etapas": medicao.etapas},
+            default=str,
+        ))
+        if texto is not None:
+            temporario = self.arquivo_prometheus.with_name(self.arquivo_prometheus.name + ".tmp")
+            temporario.write_text(texto)
+            os.replace(temporario, self.arquivo_prometheus)
+
+    def texto_prometheus(self):
+        """Métricas acumuladas no formato texto de exposição do Prometheus"""
+        linhas = [
+            "# HELP dashboard_reruns_total Reruns medidos.",
+            "# TYPE dashboard_reruns_total counter",
+            f"dashboard_reruns_total {self._reruns}",
+            "# HELP dashboard_etapa_segundos Duração das etapas do rerun.",
+            "# TYPE dashboard_etapa_segundos histogram",
+        ]
+        for etapa, totais in sorted(self._etapas.items()):
+            rotulo = _rotulo(etapa)
+            for limite, quantidade in zip(BALDES_SEGUNDOS, totais["baldes"]):
+                linhas.append(f'dashboard_etapa_segundos_bucket{{etapa="{rotulo}",le="{limite}"}} {quantidade}')
+            linhas.append(f'dashboard_etapa_segundos_bucket{{etapa="{rotulo}",le="+Inf"}} {totais["contagem"]}')
+            linhas.append(f'dashboard_etapa_segundos_sum{{etapa="{rotulo}"}} {totais["segundos"]}')
+            linhas.append(f'dashboard_etapa_segundos_count{{etapa="{rotulo}"}} {totais["contagem"]}')
+        linhas += [
+            "# HELP dashboard_etapa_linhas Linhas processadas na última execução da etapa.",
+            "# TYPE dashboard_etapa_linhas gauge",
+        ]
+        linhas += [
+            f'dashboard_etapa_linhas{{etapa="{_rotulo(etapa)}"}} {totais["linhas"]}'
+            for etapa, totais in sorted(self._etapas.items())
+        ]
+        linhas += [
+            "# HELP dashboard_etapa_bytes Payload (bytes) da última execução da etapa.",
+            "# TYPE dashboard_etapa_bytes gauge",
+        ]
+        linhas += [
+            f'dashboard_etapa_bytes{{etapa="{_rotulo(etapa)}"}} {totais["bytes"]}'
+            for etapa, totais in sorted(self._etapas.items())
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def _servir(self, porta):
+        """Serve ``/metrics`` em 127.0.0.1:porta numa thread de fundo"""
+        instrumentacao = self
+
+        class Metricas(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                with instrumentacao._lock:
+                    corpo = instrumentacao.texto_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), Metricas)
+        except OSError:
+            # Outro processo do painel já serve a porta
+            logger.warning("Porta %s do Prometheus indisponível", porta)
+            return
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+
+
+def instrumentacao_do_ambiente():
+    """Instrumentação configurada pelas variáveis ``DASHBOARD_INSTRUMENTACAO``/``PROMETHEUS_*``"""
+    habilitada = os.environ.get("DASHBOARD_INSTRUMENTACAO", "0") == "1"
+    if habilitada and not logger.handlers:
+        arquivo_log = os.environ.get("DASHBOARD_INSTRUMENTACAO_LOG")
+        manipulador = logging.FileHandler(arquivo_log) if arquivo_log else logging.StreamHandler(sys.stderr)
+        manipulador.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(manipulador)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return Instrumentacao(
+        habilitada=habilitada,
+        arquivo_prometheus=os.environ.get("DASHBOARD_PROMETHEUS_ARQUIVO"),
+        porta_prometheus=os.environ.get("DASHBOARD_PROMETHEUS_PORTA"),
+    )
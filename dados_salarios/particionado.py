@@ -0,0 +1,502 @@
+"""Conjunto fora da memória: consultas sobre Parquet particionado por ``ano``.
+
+Para bases maiores que a memória de um processo, ``DASHBOARD_PARTICOES``
+aponta para um diretório de arquivos Parquet particionados no estilo Hive
+(``ano=2024/...``). Nada é carregado em um DataFrame: cada consulta vira um
+plano do Acero (motor de execução do Arrow) que varre só as colunas usadas,
+com os filtros da barra lateral empurrados para a leitura. Partições de
+outros anos nem são abertas, e row groups fora da faixa de salário são
+descartados pelas estatísticas do Parquet. Os agrupamentos de cada gráfico
+rodam dentro do motor; só os resultados agrupados (dezenas a milhares de
+linhas) voltam ao Python.
+
+Uma consulta faz poucas varreduras, cada uma servindo vários gráficos:
+
+- contagem e soma por (ano, senioridade, remoto, tamanho_empresa): totais,
+  médias por ano e senioridade e contagens por modalidade e porte;
+- contagem e soma por (cargo, país): ranking de cargos, cargo mais comum,
+  ranking de países e o mapa de qualquer cargo;
+- t-digest de ``usd`` por ano e no total: percentis (aproximados);
+- contagem por faixa do histograma.
+
+Na comparação de segmentos, cada lado vem de ``consultar`` (o lado que não
+mudou sai do cache) e o histograma dos dois lados sai de uma só varredura da
+união dos filtros, com cada linha marcada pelos segmentos a que pertence.
+
+Os resultados ficam no mesmo cache LRU do conjunto em memória, sob a mesma
+assinatura normalizada dos filtros. Facetas e totais vêm de uma tabela de
+contagens por combinação das dimensões de filtro, calculada na abertura
+(sem faixa de salário) ou por faixa.
+
+``particionar`` grava o snapshot local nesse formato; bases maiores são
+particionadas direto na origem.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.acero as acero
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from . import exportacao, fonte
+from .agregacao import (
+    BINS_HISTOGRAMA,
+    PERCENTIS_EVOLUCAO,
+    TOP_N,
+    SEGMENTOS,
+    ResultadoAgregado,
+    ResultadoComparacao,
+    bins_freedman_diaconis,
+    bordas_comparacao,
+    bordas_histograma,
+    histograma_segmentos,
+)
+from .cache import CacheLRU, orcamento_do_ambiente
+from .conjunto import _bins_do_ambiente, segmento_base
+from .frequentes import indices_top_k
+from .indices import DIMENSOES_FILTRO
+from .quantis import PERCENTIS_KPI
+
+PARTICIONAMENTO = ds.partitioning(pa.schema([("ano", pa.int16())]), flavor="hive")
+
+# Dimensões de baixa cardinalidade agregadas juntas em uma só varredura
+DIMENSOES_RESUMO = ["ano", "senioridade", "remoto", "tamanho_empresa"]
+
+# Linhas por lote lido dos arquivos (páginas e exportação)
+TAMANHO_LOTE = exportacao.TAMANHO_BLOCO
+
+
+def diretorio_do_ambiente():
+    """Diretório dos arquivos particionados (DASHBOARD_PARTICOES), ou None"""
+    diretorio = os.environ.get("DASHBOARD_PARTICOES")
+    return Path(diretorio) if diretorio else None
+
+
+def impressao_particoes(diretorio):
+    """Caminho, tamanho e mtime de cada arquivo Parquet: muda quando a base muda"""
+    return tuple(
+        (str(arquivo), arquivo.stat().st_size, arquivo.stat().st_mtime_ns)
+        for arquivo in sorted(Path(diretorio).rglob("*.parquet"))
+    )
+
+
+def particionar(destino, arquivos=None):
+    """Grava os arquivos Parquet (padrão: o snapshot) particionados por ``ano``
+
+    A cópia é feita em lotes, sem carregar a base inteira.
+    """
+    arquivos = fonte.arquivos_snapshot() if arquivos is None else arquivos
+    origem = ds.dataset([str(arquivo) for arquivo in arquivos], format="parquet")
+    esquema = pa.schema([
+        campo.with_type(pa.int16()) if campo.name == "ano" else campo
+        for campo in origem.schema
+        if campo.name in fonte.COLUNAS_PAINEL
+    ])
+    lotes = (
+        lote.cast(esquema)
+        for lote in origem.to_batches(columns=esquema.names, batch_size=TAMANHO_LOTE)
+    )
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(esquema, lotes),
+        destino,
+        format="parquet",
+        partitioning=PARTICIONAMENTO,
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        existing_data_behavior="delete_matching",
+    )
+
+
+class Recorte:
+    """Linhas filtradas de um conjunto particionado (filtro e total, sem ids)"""
+
+    def __init__(self, filtro, total):
+        self.filtro = filtro
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+
+class ConjuntoParticionado:
+    """Conjunto de dados consultado direto dos arquivos Parquet particionados
+
+    Oferece a mesma interface de ``ConjuntoDados`` usada pelo painel; as
+    "linhas selecionadas" são um ``Recorte`` (filtro e total), não ids.
+    """
+
+    def __init__(self, diretorio, bins_histograma=BINS_HISTOGRAMA):
+        self.diretorio = Path(diretorio)
+        self.impressao = impressao_particoes(self.diretorio)
+        self.dataset = ds.dataset(self.diretorio, format="parquet", partitioning=PARTICIONAMENTO)
+        self.bins_histograma = bins_histograma
+        self.versao = 1
+        self.cache = CacheLRU(orcamento_do_ambiente("DASHBOARD_CACHE_MB", 64))
+        self.colunas = [coluna for coluna in fonte.COLUNAS_PAINEL if coluna in self.dataset.schema.names]
+
+        # Contagens por combinação das dimensões de filtro (dezenas de linhas)
+        self.contagens = self._contagens_por_filtro(None)
+        extremos = self._agregar(None, [("usd", "min_max", None, "extremos")]).column("extremos")[0]
+        self.minimo = extremos["min"].as_py() if extremos.is_valid else 0
+        self.maximo = extremos["max"].as_py() if extremos.is_valid else 0
+        self.total_linhas = int(self.contagens["n"].sum())
+        self._opcoes = {
+            dimensao: sorted(self.contagens[dimensao].dropna().unique().tolist())
+            for dimensao in DIMENSOES_FILTRO
+        }
+        self._relatorio_memoria = None
+
+    # --- Execução no motor ---
+
+    def _agregar(self, filtro, agregacoes, chaves=(), projecao=None, colunas=None):
+        """Executa scan -> filtro -> (projeção) -> agregação e devolve a tabela pequena"""
+        if colunas is None:
+            colunas = {entrada[0] for entrada in agregacoes} | set(chaves)
+            colunas |= set(DIMENSOES_FILTRO) if filtro is not None else set()
+        opcoes_scan = {"columns": sorted(colunas & set(self.dataset.schema.names))}
+        if filtro is not None:
+            opcoes_scan["filter"] = filtro
+        nos = [acero.Declaration("scan", acero.ScanNodeOptions(self.dataset, **opcoes_scan))]
+        if filtro is not None:
+            # O scan usa o filtro só para podar partições e row groups
+            nos.append(acero.Declaration("filter", acero.FilterNodeOptions(filtro)))
+        if projecao is not None:
+            nos.append(acero.Declaration(
+                "project", acero.ProjectNodeOptions(list(projecao.values()), list(projecao))
+            ))
+        nos.append(acero.Declaration("aggregate", acero.AggregateNodeOptions(agregacoes, keys=list(chaves))))
+        return acero.Declaration.from_sequence(nos).to_table()
+
+    def _filtro(self, selecoes, faixa_salario=None):
+        """Expressão do Arrow equivalente aos filtros (None quando nada é filtrado)"""
+        partes, faixa = self.assinatura(selecoes, faixa_salario)
+        termos = [pc.field(dimensao).isin(list(valores)) for dimensao, valores in partes if valores != "*"]
+        if faixa is not None:
+            termos.append((pc.field("usd") >= faixa[0]) & (pc.field("usd") <= faixa[1]))
+        filtro = None
+        for termo in termos:
+            filtro = termo if filtro is None else filtro & termo
+        return filtro
+
+    def _contagens_por_filtro(self, faixa):
+        """Linhas por combinação das dimensões de filtro, dentro da faixa de salário"""
+        filtro = None if faixa is None else (pc.field("usd") >= faixa[0]) & (pc.field("usd") <= faixa[1])
+        tabela = self._agregar(
+            filtro, [("usd", "hash_count", None, "n")], DIMENSOES_FILTRO, colunas=set(DIMENSOES_FILTRO) | {"usd"}
+        )
+        return tabela.to_pandas()
+
+    # --- Interface de ConjuntoDados ---
+
+    @property
+    def relatorio_memoria(self):
+        """Tamanho de cada coluna nos arquivos: descomprimido e em disco"""
+        if self._relatorio_memoria is None:
+            antes = dict.fromkeys(self.colunas, 0)
+            depois = dict.fromkeys(self.colunas, 0)
+            for fragmento in self.dataset.get_fragments():
+                metadados = fragmento.metadata
+                for i in range(metadados.num_row_groups):
+                    grupo = metadados.row_group(i)
+                    for j in range(grupo.num_columns):
+                        coluna = grupo.column(j)
+                        if coluna.path_in_schema in antes:
+                            antes[coluna.path_in_schema] += coluna.total_uncompressed_size
+                            depois[coluna.path_in_schema] += coluna.total_compressed_size
+            relatorio = pd.DataFrame({
+                "tipo": [str(self.dataset.schema.field(coluna).type) for coluna in self.colunas],
+                "bytes_antes": [antes[coluna] for coluna in self.colunas],
+                "bytes_depois": [depois[coluna] for coluna in self.colunas],
+            }, index=self.colunas)
+            relatorio["bytes_economizados"] = relatorio["bytes_antes"] - relatorio["bytes_depois"]
+            self._relatorio_memoria = relatorio
+        return self._relatorio_memoria
+
+    def limites_salario(self):
+        return self.minimo, self.maximo
+
+    def opcoes(self, dimensao):
+        return self._opcoes[dimensao]
+
+    def cargos(self):
+        """Cargos distintos, em ordem alfabética"""
+        def calcular():
+            tabela = self._agregar(None, [("usd", "hash_count", None, "n")], ["cargo"])
+            return sorted(tabela["cargo"].to_pylist())
+
+        return self.cache.obter_ou_calcular(("cargos",), calcular)
+
+    def assinatura(self, selecoes, faixa_salario=None):
+        """Chave normalizada dos filtros (mesmas regras de ``ConjuntoDados``)"""
+        partes = []
+        for dimensao in sorted(selecoes):
+            valores = self._opcoes[dimensao]
+            selecionados = set(selecoes[dimensao])
+            if selecionados.issuperset(valores):
+                partes.append((dimensao, "*"))
+            else:
+                partes.append((dimensao, tuple(v for v in valores if v in selecionados)))
+        if faixa_salario is None or (faixa_salario[0] <= self.minimo and faixa_salario[1] >= self.maximo):
+            faixa = None
+        else:
+            faixa = (faixa_salario[0], faixa_salario[1])
+        return tuple(partes), faixa
+
+    def _contagens(self, faixa):
+        if faixa is None:
+            return self.contagens
+        return self.cache.obter_ou_calcular(("contagens", faixa), lambda: self._contagens_por_filtro(faixa))
+
+    def facetas(self, selecoes, faixa_salario=None):
+        """Contagem por opção de cada dimensão de filtro sob os demais filtros"""
+        partes, faixa = self.assinatura(selecoes, faixa_salario)
+
+        def calcular():
+            contagens = self._contagens(faixa)
+            resultado = {}
+            for dimensao in DIMENSOES_FILTRO:
+                manter = np.ones(len(contagens), dtype=bool)
+                for outra, valores in partes:
+                    if outra != dimensao and valores != "*":
+                        manter &= contagens[outra].isin(valores).to_numpy()
+                serie = contagens[manter].groupby(dimensao, observed=True)["n"].sum()
+                resultado[dimensao] = serie.reindex(self.opcoes(dimensao), fill_value=0).astype("int64")
+            return resultado
+
+        return self.cache.obter_ou_calcular(("facetas", (partes, faixa)), calcular)
+
+    def selecionar_linhas(self, selecoes, faixa_salario=None):
+        """Recorte dos filtros (filtro do Arrow e total de linhas), ou None sem filtro"""
+        partes, faixa = self.assinatura(selecoes, faixa_salario)
+        filtro = self._filtro(selecoes, faixa_salario)
+        if filtro is None:
+            return None
+        contagens = self._contagens(faixa)
+        manter = np.ones(len(contagens), dtype=bool)
+        for dimensao, valores in partes:
+            if valores != "*":
+                manter &= contagens[dimensao].isin(valores).to_numpy()
+        return Recorte(filtro, int(contagens.loc[manter, "n"].sum()))
+
+    def _scanner(self, recorte, colunas=None):
+        return self.dataset.scanner(
+            columns=colunas or self.colunas,
+            filter=None if recorte is None else recorte.filtro,
+            batch_size=TAMANHO_LOTE,
+        )
+
+    def pagina(self, recorte, inicio, tamanho, ordenar_por=None, crescente=True):
+        """Fatia [inicio, inicio + tamanho) das linhas filtradas, já ordenada
+
+        Com ordenação, os lotes são lidos em sequência guardando só as
+        ``inicio + tamanho`` primeiras linhas (seleção parcial a cada lote).
+        """
+        total = self.total_linhas if recorte is None else len(recorte)
+        fim = min(inicio + tamanho, total)
+        if fim <= inicio:
+            return pd.DataFrame(columns=self.colunas)
+
+        if ordenar_por is None:
+            indices = np.arange(inicio, fim) if crescente else total - 1 - np.arange(inicio, fim)
+            tabela = self._scanner(recorte).take(pa.array(indices))
+        else:
+            ordem = [(ordenar_por, "ascending" if crescente else "descending")]
+            tabela = None
+            for lote in self._scanner(recorte).to_batches():
+                candidatas = pa.Table.from_batches([lote]) if tabela is None else pa.concat_tables(
+                    [tabela, pa.Table.from_batches([lote])], promote_options="permissive"
+                )
+                if candidatas.num_rows > fim:
+                    candidatas = candidatas.take(pc.select_k_unstable(candidatas, fim, ordem))
+                tabela = candidatas
+            tabela = tabela.take(pc.sort_indices(tabela, ordem)).slice(inicio, fim - inicio)
+        return tabela.select(self.colunas).to_pandas()
+
+    def exportar(self, formato, recorte=None):
+        """Arquivo de exportação das linhas filtradas, gravado lote a lote"""
+        vazia = self.dataset.schema.empty_table().select(self.colunas)
+        blocos = (lote.to_pandas() for lote in self._scanner(recorte).to_batches() if lote.num_rows)
+        return exportacao.exportar_blocos(
+            formato, vazia.to_pandas(), blocos, esquema=vazia.schema.remove_metadata()
+        )
+
+    # --- Agregados ---
+
+    def _cargo_pais(self, filtro, chave):
+        """Contagem e soma de ``usd`` por (cargo, país) sob os filtros"""
+        def calcular():
+            tabela = self._agregar(
+                filtro,
+                [("usd", "hash_count", None, "n"), ("usd", "hash_sum", None, "soma")],
+                ["cargo", "residencia_iso3"],
+            )
+            return tabela.to_pandas()
+
+        return self.cache.obter_ou_calcular(("cargo_pais", chave), calcular)
+
+    def consultar(self, selecoes, faixa_salario=None):
+        """Resultado agregado dos filtros, servido do cache quando possível"""
+        chave = self.assinatura(selecoes, faixa_salario)
+        return self.cache.obter_ou_calcular(
+            chave, lambda: self._calcular(self._filtro(selecoes, faixa_salario), chave)
+        )
+
+    def _calcular(self, filtro, chave):
+        resumo = self._agregar(filtro, [
+            ("usd", "hash_count", None, "n"),
+            ("usd", "hash_sum", None, "soma"),
+            ("usd", "hash_min", None, "minimo"),
+            ("usd", "hash_max", None, "maximo"),
+        ], DIMENSOES_RESUMO).to_pandas()
+        cargo_pais = self._cargo_pais(filtro, chave)
+
+        total = int(resumo["n"].sum())
+        percentis = self._percentis(filtro, None, PERCENTIS_KPI)
+        valores_percentis = (
+            percentis.iloc[0].to_numpy() if len(percentis) else np.full(len(PERCENTIS_KPI), np.nan)
+        )
+        percentis = dict(zip(PERCENTIS_KPI, valores_percentis))
+
+        por_cargo = cargo_pais.groupby("cargo", observed=True)[["n", "soma"]].sum().sort_index()
+        cargo_mais_frequente = por_cargo["n"].idxmax() if len(por_cargo) else "N/A"
+
+        return ResultadoAgregado(
+            total_registros=total,
+            salario_medio=resumo["soma"].sum() / total if total else np.nan,
+            salario_mediano=percentis[50],
+            percentis=percentis,
+            salario_maximo=float(resumo["maximo"].max()) if total else np.nan,
+            salario_minimo=float(resumo["minimo"].min()) if total else np.nan,
+            cargo_mais_frequente=cargo_mais_frequente,
+            top_cargos=self._top_media(por_cargo, "cargo"),
+            media_por_senioridade=self._media(resumo, "senioridade"),
+            media_por_ano=self._media(resumo, "ano"),
+            percentis_por_ano=self._percentis(filtro, "ano", PERCENTIS_EVOLUCAO),
+            top_paises=self._top_media(
+                cargo_pais.groupby("residencia_iso3", observed=True)[["n", "soma"]].sum().sort_index(),
+                "residencia_iso3",
+            ),
+            contagem_remoto=self._contagem(resumo, "remoto"),
+            contagem_tamanho=self._contagem(resumo, "tamanho_empresa"),
+            histograma=self._histograma(filtro, chave[1], total, valores_percentis),
+            quantis_aproximados=True,
+        )
+
+    @staticmethod
+    def _media(resumo, coluna):
+        somas = resumo.groupby(coluna, observed=True)[["n", "soma"]].sum().sort_index()
+        somas = somas[somas["n"] > 0]
+        return (somas["soma"] / somas["n"]).rename("usd")
+
+    @staticmethod
+    def _top_media(somas, coluna):
+        media = (somas["soma"] / somas["n"]).rename("usd").rename_axis(coluna)
+        return media.iloc[indices_top_k(media.to_numpy(), TOP_N)]
+
+    @staticmethod
+    def _contagem(resumo, coluna):
+        contagem = resumo.groupby(coluna, observed=True)["n"].sum().sort_index().rename("count")
+        return contagem[contagem > 0].sort_values(ascending=False, kind="stable")
+
+    def _percentis(self, filtro, chave, percentis):
+        """Percentis de ``usd`` (t-digest no motor), por ``chave`` ou no total"""
+        opcoes = pc.TDigestOptions(q=[p / 100 for p in percentis])
+        if chave is None:
+            # O t-digest escalar devolve um só quantil: agrupa por uma constante
+            tabela = self._agregar(
+                filtro, [("usd", "hash_tdigest", opcoes, "q")], ["grupo"],
+                projecao={"usd": pc.field("usd"), "grupo": pc.scalar(0)},
+            )
+        else:
+            tabela = self._agregar(filtro, [("usd", "hash_tdigest", opcoes, "q")], [chave])
+            tabela = tabela.sort_by(chave)
+        valores = np.array(tabela["q"].to_pylist(), dtype="float64").reshape(-1, len(percentis))
+        resultado = pd.DataFrame(valores, columns=[f"p{p}" for p in percentis])
+        if chave is not None:
+            resultado.index = pd.Index(tabela[chave].to_pylist(), name=chave)
+        return resultado
+
+    def _histograma(self, filtro, faixa, total, valores_percentis):
+        """Contagem por faixa calculada no motor (índice da faixa projetado por linha)"""
+        inicio, fim = faixa if faixa is not None else (self.minimo, self.maximo)
+        inicio, fim = max(inicio, self.minimo), min(fim, self.maximo)
+        bins = self.bins_histograma
+        if bins == "auto":
+            q1, q3 = (valores_percentis[0], valores_percentis[2]) if total else (0.0, 0.0)
+            bins = bins_freedman_diaconis(q1, q3, total, inicio, fim)
+        bordas = bordas_histograma(np.empty(0), inicio, fim, bins)
+        tabela = self._agregar(
+            filtro, [("usd", "hash_count", None, "n")], ["faixa"],
+            projecao={"usd": pc.field("usd"), "faixa": self._indice_faixa(bordas)},
+        )
+        quantidade = self._quantidades(tabela["faixa"].to_numpy(), tabela["n"].to_numpy(), len(bordas) - 1)
+        return pd.DataFrame({"inicio": bordas[:-1], "fim": bordas[1:], "quantidade": quantidade})
+
+    @staticmethod
+    def _indice_faixa(bordas):
+        """Expressão com o índice da faixa do histograma de cada linha"""
+        n_faixas = len(bordas) - 1
+        largura = (bordas[-1] - bordas[0]) / n_faixas
+        indice = pc.floor(pc.divide(pc.subtract(pc.field("usd").cast(pa.float64()), bordas[0]), largura))
+        # O último intervalo é fechado à direita, como em np.histogram
+        return pc.min_element_wise(indice, n_faixas - 1).cast(pa.int32())
+
+    @staticmethod
+    def _quantidades(faixas, contagens, n_faixas):
+        """Soma as contagens por índice de faixa, descartando índices fora das bordas"""
+        dentro = (faixas >= 0) & (faixas < n_faixas)
+        return np.bincount(faixas[dentro], weights=contagens[dentro], minlength=n_faixas).astype("int64")
+
+    def comparar(self, segmento_a, segmento_b):
+        """Resultados de dois segmentos ``(selecoes, faixa_salario)`` lado a lado"""
+        segmentos = [segmento_a, segmento_b]
+        resultados = [self.consultar(*segmento) for segmento in segmentos]
+        bordas = bordas_comparacao([faixa for _, faixa in segmentos], self.minimo, self.maximo, self.bins_histograma)
+        chave = (
+            "histograma_comparacao",
+            tuple(self.assinatura(*segmento) for segmento in segmentos),
+            bordas[0], bordas[-1], len(bordas),
+        )
+
+        def calcular():
+            # Uma varredura da base comum: cada linha leva a faixa e a que segmentos pertence
+            projecao = {"usd": pc.field("usd"), "faixa": self._indice_faixa(bordas)}
+            for rotulo, segmento in zip(SEGMENTOS, segmentos):
+                filtro = self._filtro(*segmento)
+                projecao[rotulo] = pc.scalar(True) if filtro is None else filtro
+            tabela = self._agregar(
+                self._filtro(*segmento_base(segmentos)),
+                [("usd", "hash_count", None, "n")],
+                ["faixa", *SEGMENTOS],
+                projecao=projecao,
+                colunas=set(DIMENSOES_FILTRO) | {"usd"},
+            ).to_pandas()
+            quantidades = []
+            for rotulo in SEGMENTOS:
+                # Nulos nas colunas filtradas deixam a marca nula: a linha não entra
+                marcadas = tabela[tabela[rotulo].fillna(False).astype(bool)]
+                quantidades.append(self._quantidades(
+                    marcadas["faixa"].to_numpy(), marcadas["n"].to_numpy(), len(bordas) - 1
+                ))
+            return histograma_segmentos(bordas, quantidades)
+
+        return ResultadoComparacao(*resultados, self.cache.obter_ou_calcular(chave, calcular))
+
+    def consultar_mapa(self, cargo, selecoes, faixa_salario=None):
+        """Salário médio por país de um cargo, da tabela (cargo, país) da consulta"""
+        chave = self.assinatura(selecoes, faixa_salario)
+
+        def calcular():
+            cargo_pais = self._cargo_pais(self._filtro(selecoes, faixa_salario), chave)
+            do_cargo = cargo_pais[(cargo_pais["cargo"] == cargo) & (cargo_pais["n"] > 0)]
+            do_cargo = do_cargo.groupby("residencia_iso3", observed=True)[["n", "soma"]].sum().sort_index()
+            return (do_cargo["soma"] / do_cargo["n"]).rename("usd")
+
+        return self.cache.obter_ou_calcular(("mapa", cargo, chave), calcular)
+
+
+def carregar_particionado(diretorio):
+    """Abre o conjunto particionado, com o número de faixas do ambiente"""
+    return ConjuntoParticionado(diretorio, bins_histograma=_bins_do_ambiente())
@@ -0,0 +1,86 @@
+"""Esboços de quantis mescláveis por célula do cubo (no estilo DDSketch).
+
+Cada valor de ``usd`` cai no balde logarítmico ``k = ceil(log_gama(x))``, com
+``gama = (1 + alfa) / (1 - alfa)``. Cada célula guarda só a contagem por
+balde; mesclar células é somar contagens. O quantil estimado devolve o ponto
+representativo do balde que contém o posto pedido, e fica a no máximo
+``alfa`` (erro relativo, 1% por padrão) do valor exato de mesmo posto.
+Valores menores que 1 são tratados como 1.
+
+O posto do percentil ``p`` é ``floor((n - 1) * p / 100)``, sem interpolação;
+``percentis_exatos`` usa a mesma definição, então o modo exato e o
+aproximado diferem no máximo pelo erro relativo do esboço.
+"""
+import copy
+
+import numpy as np
+
+ERRO_RELATIVO = 0.01
+
+PERCENTIS_KPI = (25, 50, 75, 90)
+
+VALOR_MINIMO = 1.0
+
+
+def percentis_exatos(valores, percentis):
+    """Percentis exatos no mesmo posto usado pelos esboços (sem interpolação)"""
+    return np.percentile(valores, percentis, method="lower")
+
+
+class EsbocosQuantis:
+    """Matriz célula × balde de contagens, com consulta de quantis por mescla"""
+
+    def __init__(self, valores, celulas, n_celulas, erro_relativo=ERRO_RELATIVO):
+        self.erro_relativo = erro_relativo
+        self.gama = (1 + erro_relativo) / (1 - erro_relativo)
+        self.log_gama = np.log(self.gama)
+
+        baldes = self._baldes(np.asarray(valores, dtype="float64"))
+        self.balde_minimo = int(baldes.min()) if baldes.size else 0
+        n_baldes = int(baldes.max()) - self.balde_minimo + 1 if baldes.size else 1
+        posicoes = np.asarray(celulas, dtype=np.int64) * n_baldes + (baldes - self.balde_minimo)
+        self.contagens = np.bincount(posicoes, minlength=n_celulas * n_baldes).astype(np.int32)
+        self.contagens = self.contagens.reshape(n_celulas, n_baldes)
+
+    def _baldes(self, valores):
+        """Índice do balde logarítmico de cada valor"""
+        return np.ceil(np.log(np.maximum(valores, VALOR_MINIMO)) / self.log_gama).astype(np.int64)
+
+    def combinar(self, outro, celulas_deste, celulas_do_outro, n_celulas):
+        """Novos esboços somando os dois conjuntos, com as células renumeradas
+
+        ``celulas_deste``/``celulas_do_outro`` dão a nova célula de cada
+        célula antiga; a faixa de baldes passa a cobrir a dos dois.
+        """
+        com_valores = [e for e in (self, outro) if e.contagens.any()] or [self]
+        minimo = min(e.balde_minimo for e in com_valores)
+        maximo = max(e.balde_minimo + e.contagens.shape[1] for e in com_valores)
+        contagens = np.zeros((n_celulas, maximo - minimo), dtype=np.int32)
+        for esboco, celulas in ((self, celulas_deste), (outro, celulas_do_outro)):
+            if esboco in com_valores:
+                inicio = esboco.balde_minimo - minimo
+                contagens[celulas, inicio:inicio + esboco.contagens.shape[1]] += esboco.contagens
+
+        novo = copy.copy(self)
+        novo.balde_minimo = minimo
+        novo.contagens = contagens
+        return novo
+
+    def mesclar(self, mascara_celulas):
+        """Contagens por balde somadas sobre as células selecionadas"""
+        return self.contagens[mascara_celulas].sum(axis=0)
+
+    def quantis(self, contagens, percentis):
+        """Estimativa dos percentis (0-100) a partir de contagens mescladas"""
+        return self.quantis_por_grupo(np.asarray(contagens)[np.newaxis, :], percentis)[0]
+
+    def quantis_por_grupo(self, contagens, percentis):
+        """Percentis de cada linha de uma matriz grupo × balde (NaN nos grupos vazios)"""
+        acumulado = np.cumsum(contagens, axis=1)
+        total = acumulado[:, -1] if acumulado.shape[1] else np.zeros(len(acumulado), dtype=np.int64)
+        postos = np.floor(np.outer(total - 1, np.asarray(percentis, dtype="float64") / 100))
+        # searchsorted(side="right") de cada posto na linha do grupo
+        baldes = (acumulado[:, np.newaxis, :] <= postos[:, :, np.newaxis]).sum(axis=2) + self.balde_minimo
+        estimativas = 2 * self.gama ** baldes / (self.gama + 1)
+        estimativas[total == 0] = np.nan
+        return estimativas
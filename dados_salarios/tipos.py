@@ -0,0 +1,75 @@
+"""Normalização de tipos do DataFrame de salários no carregamento.
+
+Colunas de texto com poucos valores distintos viram ``category`` (os
+``isin``/``groupby``/``value_counts`` passam a operar sobre os códigos
+inteiros) e as colunas numéricas são reduzidas ao menor tipo que comporta
+os valores.
+
+``concatenar`` junta linhas anexadas a um DataFrame já normalizado,
+unindo as categorias para que as colunas continuem ``category``.
+"""
+import logging
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_CATEGORICAS = [
+    "cargo", "senioridade", "contrato", "tamanho_empresa", "remoto",
+    "residencia_iso3", "residencia", "empresa", "moeda",
+]
+
+COLUNAS_NUMERICAS = ["ano", "usd", "salario"]
+
+
+def _reduzir_numerica(serie):
+    """Converte para o menor tipo inteiro (ou float32) que representa a série"""
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast="integer")
+    if pd.api.types.is_float_dtype(serie):
+        return pd.to_numeric(serie, downcast="float")
+    return serie
+
+
+def normalizar_tipos(df):
+    """Converte categorias e reduz numéricos; retorna (df, relatório de memória)"""
+    antes = df.memory_usage(index=False, deep=True)
+    df = df.copy()
+
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype("category")
+
+    for coluna in COLUNAS_NUMERICAS:
+        if coluna in df.columns:
+            df[coluna] = _reduzir_numerica(df[coluna])
+
+    depois = df.memory_usage(index=False, deep=True)
+    relatorio = pd.DataFrame({
+        "tipo": df.dtypes.astype(str),
+        "bytes_antes": antes,
+        "bytes_depois": depois,
+    })
+    relatorio["bytes_economizados"] = relatorio["bytes_antes"] - relatorio["bytes_depois"]
+
+    logger.info(
+        "Tipos normalizados: %s bytes -> %s bytes (%s economizados)",
+        f"{antes.sum():,}", f"{depois.sum():,}", f"{relatorio['bytes_economizados'].sum():,}",
+    )
+    return df, relatorio
+
+
+def concatenar(df, novas):
+    """Anexa ``novas`` (já normalizadas) a ``df`` mantendo as colunas categóricas"""
+    colunas = {}
+    for coluna in df.columns:
+        antiga, nova = df[coluna], novas[coluna]
+        if isinstance(antiga.dtype, pd.CategoricalDtype):
+            colunas[coluna] = pd.Series(
+                union_categoricals([antiga, nova.astype("category")], sort_categories=True),
+                name=coluna,
+            )
+        else:
+            colunas[coluna] = pd.concat([antiga, nova], ignore_index=True)
+    return pd.DataFrame(colunas)
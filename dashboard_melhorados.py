@@ -1,7 +1,15 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+from dados_salarios import exportacao, graficos
+from dados_salarios.agregacao import CARGO_MAPA
+from dados_salarios.cache import orcamento_do_ambiente
+from dados_salarios.instrumentacao import instrumentacao_do_ambiente
+from dados_salarios.quantis import ERRO_RELATIVO
+from dados_salarios.atualizacao import ConjuntoAtualizavel
+from dados_salarios.aquecimento import aquecedor_do_ambiente
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -190,40 +198,81 @@ st.markdown("""
         font-size: 0.85rem;
         font-weight: 500;
     }
+    
+    /* Opções não selecionadas e opções que esvaziam o resultado */
+    .filter-pill-inativa {
+        background-color: #f5f5f5;
+        color: #616161;
+    }
+    
+    .filter-pill-vazia {
+        text-decoration: line-through;
+        opacity: 0.6;
+    }
     </style>
 """, unsafe_allow_html=True)
 
 # --- Função para carregar dados com cache ---
-@st.cache_data
+# cache_resource: o conjunto (dados + índices) é compartilhado entre sessões sem cópia;
+# linhas anexadas à fonte entram por atualização incremental, trocada entre reruns
+@st.cache_resource
 def carregar_dados():
-    """Carrega os dados com cache para melhor performance"""
-    df = pd.read_csv("https://raw.githubusercontent.com/vqrca/dashboard_salarios_dados/refs/heads/main/dados-imersao-final.csv")
-    return df
+    """Carrega o snapshot local e constrói os índices de filtro uma única vez"""
+    return ConjuntoAtualizavel()
+
+# Figuras serializadas por hash do agregado + estilo, compartilhadas entre sessões
+@st.cache_resource
+def carregar_cache_figuras():
+    """Cache de figuras do processo (orçamento em DASHBOARD_CACHE_FIGURAS_MB)"""
+    return graficos.CacheFiguras(orcamento_do_ambiente("DASHBOARD_CACHE_FIGURAS_MB", 32))
+
+# Estados de filtro mais pedidos calculados em segundo plano logo após a carga
+# (DASHBOARD_AQUECIMENTO=0 desliga)
+@st.cache_resource
+def carregar_aquecedor():
+    """Threads de aquecimento do cache de agregados e de figuras"""
+    return aquecedor_do_ambiente(carregar_dados(), carregar_cache_figuras())
+
+# Tempos por etapa de cada rerun (desligada por padrão: DASHBOARD_INSTRUMENTACAO=1)
+@st.cache_resource
+def carregar_instrumentacao():
+    """Instrumentação do processo, com log JSON e métricas Prometheus"""
+    return instrumentacao_do_ambiente()
+
+instrumentacao = carregar_instrumentacao()
+medicao = instrumentacao.rerun()
 
 # --- Carregamento dos dados ---
 with st.spinner('🔄 Carregando dados...'):
-    df = carregar_dados()
+    dados_atualizaveis = carregar_dados()
+    # Uma versão fixa do conjunto para todo o rerun
+    conjunto = dados_atualizaveis.atual()
+    figuras = carregar_cache_figuras()
+    aquecedor = carregar_aquecedor()
+    relatorio_memoria = conjunto.relatorio_memoria
+medicao.marco("carga", linhas=conjunto.total_linhas)
 
 # --- Barra Lateral (Filtros) ---
-with st.sidebar:
-    # Logo/Header da sidebar
-    st.markdown("""
-        <div style="text-align: center; padding: 1rem 0 1.5rem 0;">
-            <h2 style="margin: 0; color: #2c3e50;">🎯 Painel de Filtros</h2>
-            <p style="margin: 0.5rem 0 0 0; color: #3d3d3d; font-size: 0.9rem;">
-                Personalize sua análise
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # Box de informação total de dados
-    st.markdown(f"""
-        <div class="info-box">
-            <div class="info-box-title">📊 TOTAL DE REGISTROS</div>
-            <div class="info-box-value">{len(df):,}</div>
-        </div>
-    """, unsafe_allow_html=True)
-    
+# --- Filtros da barra lateral ---
+# Modo padrão de aplicação: "lote" (só recalcula ao clicar em Aplicar) ou "ao_vivo"
+MODO_FILTROS_PADRAO = os.environ.get("DASHBOARD_MODO_FILTROS", "lote")
+# Como cada modo de ``ConjuntoAtualizavel`` aparece na barra lateral
+DESCRICAO_ATUALIZACAO = {"anexado": "incremental", "reconstruido": "completa", "publicado": "de outro processo"}
+
+def desenhar_facetas(espaco, contagens, selecionados):
+    """Mostra, para cada opção, quantas linhas ela daria com os demais filtros"""
+    selecionados = set(selecionados)
+    pills = []
+    for valor, quantidade in contagens.items():
+        classes = "filter-pill" if valor in selecionados else "filter-pill filter-pill-inativa"
+        if quantidade == 0:
+            classes += " filter-pill-vazia"
+        pills.append(f'<span class="{classes}">{valor} · {quantidade:,}</span>')
+    espaco.markdown("".join(pills), unsafe_allow_html=True)
+
+def desenhar_filtros(ao_vivo):
+    """Desenha os filtros da barra lateral e retorna a seleção atual"""
+
     # --- FILTRO DE ANO ---
     st.markdown("""
         <div class="filter-section">
@@ -234,7 +283,7 @@ with st.sidebar:
         </div>
     """, unsafe_allow_html=True)
     
-    anos_disponiveis = sorted(df['ano'].unique())
+    anos_disponiveis = conjunto.opcoes('ano')
     
     # Opção de selecionar todos os anos ou range
     modo_ano = st.radio(
@@ -265,6 +314,8 @@ with st.sidebar:
         anos_selecionados = [ano for ano in anos_disponiveis if ano_inicio <= ano <= ano_fim]
         st.info(f"📊 {len(anos_selecionados)} anos no intervalo")
     
+    facetas_ano = st.empty()
+    
     st.markdown("<br>", unsafe_allow_html=True)
     
     # --- FILTRO DE SENIORIDADE ---
@@ -277,7 +328,7 @@ with st.sidebar:
         </div>
     """, unsafe_allow_html=True)
     
-    senioridades_disponiveis = sorted(df['senioridade'].unique())
+    senioridades_disponiveis = conjunto.opcoes('senioridade')
     
     # Opção rápida: todos ou seleção manual
     if st.checkbox("Selecionar todas as senioridades", value=True, key="todos_senioridade"):
@@ -290,11 +341,8 @@ with st.sidebar:
             help="Filtre por nível profissional"
         )
     
-    # Mostrar seleção com pills
-    if senioridades_selecionadas:
-        st.markdown("**Selecionados:**")
-        pills_html = "".join([f'<span class="filter-pill">{s}</span>' for s in senioridades_selecionadas])
-        st.markdown(pills_html, unsafe_allow_html=True)
+    # Pills de todas as opções, com a contagem de cada uma (preenchidas no fim)
+    facetas_senioridade = st.empty()
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -308,7 +356,7 @@ with st.sidebar:
         </div>
     """, unsafe_allow_html=True)
     
-    contratos_disponiveis = sorted(df['contrato'].unique())
+    contratos_disponiveis = conjunto.opcoes('contrato')
     
     # Usar expander para economizar espaço
     with st.expander("Selecionar tipos de contrato", expanded=False):
@@ -324,6 +372,7 @@ with st.sidebar:
                     contratos_selecionados.append(contrato)
     
     st.markdown(f'<div class="filter-badge">✓ {len(contratos_selecionados)} tipos selecionados</div>', unsafe_allow_html=True)
+    facetas_contrato = st.empty()
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -337,7 +386,7 @@ with st.sidebar:
         </div>
     """, unsafe_allow_html=True)
     
-    tamanhos_disponiveis = sorted(df['tamanho_empresa'].unique())
+    tamanhos_disponiveis = conjunto.opcoes('tamanho_empresa')
     
     # Radio buttons para seleção mais visual
     modo_tamanho = st.radio(
@@ -357,9 +406,7 @@ with st.sidebar:
             default=tamanhos_disponiveis,
             help="Selecione os portes de empresa"
         )
-        if tamanhos_selecionados:
-            for tamanho in tamanhos_selecionados:
-                st.markdown(f'<span class="filter-pill">🏢 {tamanho}</span>', unsafe_allow_html=True)
+    facetas_tamanho = st.empty()
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -375,10 +422,10 @@ with st.sidebar:
     
     usar_filtro_salario = st.checkbox("Ativar filtro de salário", value=False)
     
+    # Limites pré-computados no carregamento
+    salario_min, salario_max = conjunto.limites_salario()
+    
     if usar_filtro_salario:
-        salario_min = int(df['usd'].min())
-        salario_max = int(df['usd'].max())
-        
         faixa_salario = st.slider(
             "Selecione a faixa:",
             min_value=salario_min,
@@ -389,10 +436,35 @@ with st.sidebar:
         )
         st.info(f"💵 De ${faixa_salario[0]:,} até ${faixa_salario[1]:,}")
     else:
-        faixa_salario = (int(df['usd'].min()), int(df['usd'].max()))
+        faixa_salario = (salario_min, salario_max)
     
     st.markdown("---")
     
+    filtros = {
+        'anos': anos_selecionados,
+        'senioridades': senioridades_selecionadas,
+        'contratos': contratos_selecionados,
+        'tamanhos': tamanhos_selecionados,
+        'usar_filtro_salario': usar_filtro_salario,
+        'faixa_salario': faixa_salario,
+    }
+    
+    # Contagens por opção sob os demais filtros em edição, do índice de contagens
+    # (servidas do cache); desenhadas nos espaços reservados acima
+    facetas = conjunto.facetas(
+        {
+            'ano': anos_selecionados,
+            'senioridade': senioridades_selecionadas,
+            'contrato': contratos_selecionados,
+            'tamanho_empresa': tamanhos_selecionados,
+        },
+        faixa_salario if usar_filtro_salario else None,
+    )
+    desenhar_facetas(facetas_ano, facetas['ano'], anos_selecionados)
+    desenhar_facetas(facetas_senioridade, facetas['senioridade'], senioridades_selecionadas)
+    desenhar_facetas(facetas_contrato, facetas['contrato'], contratos_selecionados)
+    desenhar_facetas(facetas_tamanho, facetas['tamanho_empresa'], tamanhos_selecionados)
+    
     # --- AÇÕES RÁPIDAS ---
     st.markdown("### ⚡ Ações Rápidas")
     
@@ -404,7 +476,86 @@ with st.sidebar:
     
     with col_btn2:
         if st.button("📊 Aplicar", use_container_width=True, type="primary"):
-            st.success("✅ Filtros aplicados!")
+            if ao_vivo:
+                st.success("✅ Filtros aplicados!")
+            else:
+                st.session_state['filtros_aplicados'] = filtros
+                st.rerun()
+    
+    if not ao_vivo and st.session_state.get('filtros_aplicados', filtros) != filtros:
+        st.warning("⏳ Há alterações ainda não aplicadas. Clique em **📊 Aplicar** para atualizar o painel.")
+    
+    st.markdown("---")
+    
+    return filtros
+
+with st.sidebar:
+    # Logo/Header da sidebar
+    st.markdown("""
+        <div style="text-align: center; padding: 1rem 0 1.5rem 0;">
+            <h2 style="margin: 0; color: #2c3e50;">🎯 Painel de Filtros</h2>
+            <p style="margin: 0.5rem 0 0 0; color: #3d3d3d; font-size: 0.9rem;">
+                Personalize sua análise
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Box de informação total de dados
+    st.markdown(f"""
+        <div class="info-box">
+            <div class="info-box-title">📊 TOTAL DE REGISTROS</div>
+            <div class="info-box-value">{conjunto.total_linhas:,}</div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Painel de depuração: preenchido no fim do rerun, quando os tempos estão prontos
+    if medicao.habilitada:
+        painel_depuracao = st.empty()
+    
+    with st.expander("💾 Uso de Memória", expanded=False):
+        economia_total = relatorio_memoria['bytes_economizados'].sum()
+        st.caption(f"{economia_total / 1024**2:,.1f} MB economizados com tipos compactos")
+        st.dataframe(relatorio_memoria, use_container_width=True)
+        
+        estatisticas_cache = conjunto.cache.estatisticas()
+        st.caption(
+            f"🗄️ Cache de agregados: {estatisticas_cache['entradas']} entradas, "
+            f"{estatisticas_cache['bytes_usados'] / 1024**2:,.1f} MB · "
+            f"{estatisticas_cache['acertos']} acertos / {estatisticas_cache['falhas']} falhas"
+        )
+        if aquecedor.habilitado:
+            st.caption(f"🔥 {aquecedor.aquecidos} estados de filtro pré-calculados em segundo plano")
+        
+        ultima_mudanca = dados_atualizaveis.ultima_mudanca
+        if ultima_mudanca is not None:
+            st.caption(
+                f"🔄 Dados na versão {conjunto.versao}: última atualização "
+                f"{DESCRICAO_ATUALIZACAO.get(ultima_mudanca['modo'], 'completa')} com "
+                f"{ultima_mudanca['linhas_novas']:,} linhas em {ultima_mudanca['segundos']:.2f} s"
+            )
+    
+    # --- MODO DE APLICAÇÃO ---
+    filtros_ao_vivo = st.toggle(
+        "⚡ Aplicar filtros automaticamente",
+        value=MODO_FILTROS_PADRAO == "ao_vivo",
+        help="Desativado: as alterações só atualizam o painel ao clicar em Aplicar"
+    )
+    
+    if filtros_ao_vivo:
+        filtros = desenhar_filtros(ao_vivo=True)
+        st.session_state['filtros_aplicados'] = filtros
+    else:
+        # Em lote, mudanças nos widgets reexecutam apenas este fragmento da barra
+        # lateral; filtragem, agregação e gráficos rodam só ao clicar em Aplicar
+        filtros_editados = st.fragment(desenhar_filtros)(ao_vivo=False)
+        filtros = st.session_state.setdefault('filtros_aplicados', filtros_editados)
+    
+    anos_selecionados = filtros['anos']
+    senioridades_selecionadas = filtros['senioridades']
+    contratos_selecionados = filtros['contratos']
+    tamanhos_selecionados = filtros['tamanhos']
+    usar_filtro_salario = filtros['usar_filtro_salario']
+    faixa_salario = filtros['faixa_salario']
     
     st.markdown("---")
     
@@ -429,14 +580,20 @@ with st.sidebar:
     """, unsafe_allow_html=True)
 
 # --- Filtragem do DataFrame ---
-df_filtrado = df[
-    (df['ano'].isin(anos_selecionados)) &
-    (df['senioridade'].isin(senioridades_selecionadas)) &
-    (df['contrato'].isin(contratos_selecionados)) &
-    (df['tamanho_empresa'].isin(tamanhos_selecionados)) &
-    (df['usd'] >= faixa_salario[0]) &
-    (df['usd'] <= faixa_salario[1])
-]
+selecoes = {
+    'ano': anos_selecionados,
+    'senioridade': senioridades_selecionadas,
+    'contrato': contratos_selecionados,
+    'tamanho_empresa': tamanhos_selecionados,
+}
+
+# Todos os KPIs e entradas dos gráficos em uma única passada (ou rollup do cubo),
+# compartilhados entre sessões pelo cache LRU do conjunto de dados
+medicao.marco("barra_lateral")
+aquecedor.registrar(selecoes, faixa_salario)
+with medicao.etapa("consulta") as registro_consulta:
+    resultado = conjunto.consultar(selecoes, faixa_salario)
+    registro_consulta["linhas"] = resultado.total_registros
 
 # --- Conteúdo Principal ---
 # Header com ícone e descrição
@@ -451,16 +608,17 @@ with col_header1:
     """, unsafe_allow_html=True)
 
 with col_header2:
-    percentual_filtrado = (len(df_filtrado) / len(df) * 100) if len(df) > 0 else 0
+    percentual_filtrado = (resultado.total_registros / conjunto.total_linhas * 100) if conjunto.total_linhas > 0 else 0
     st.metric(
         label="Dados Filtrados",
-        value=f"{len(df_filtrado):,}",
+        value=f"{resultado.total_registros:,}",
         delta=f"{percentual_filtrado:.1f}% do total"
     )
 
 # Verificação de dados
-if df_filtrado.empty:
+if resultado.total_registros == 0:
     st.error("⚠️ Nenhum dado corresponde aos filtros selecionados. Por favor, ajuste os filtros na barra lateral.")
+    instrumentacao.registrar(medicao, versao=conjunto.versao, linhas=0)
     st.stop()
 
 st.markdown("---")
@@ -468,13 +626,13 @@ st.markdown("---")
 # --- Métricas Principais (KPIs) ---
 st.subheader("📊 Principais Indicadores")
 
-# Cálculo das métricas
-salario_medio = df_filtrado['usd'].mean()
-salario_mediano = df_filtrado['usd'].median()
-salario_maximo = df_filtrado['usd'].max()
-salario_minimo = df_filtrado['usd'].min()
-total_registros = df_filtrado.shape[0]
-cargo_mais_frequente = df_filtrado["cargo"].mode()[0] if not df_filtrado.empty else "N/A"
+# Métricas vindas do resultado agregado
+salario_medio = resultado.salario_medio
+salario_mediano = resultado.salario_mediano
+salario_maximo = resultado.salario_maximo
+salario_minimo = resultado.salario_minimo
+total_registros = resultado.total_registros
+cargo_mais_frequente = resultado.cargo_mais_frequente
 
 # Exibir métricas em colunas
 col1, col2, col3, col4, col5 = st.columns(5)
@@ -490,7 +648,7 @@ with col2:
     st.metric(
         label="📊 Salário Mediano",
         value=f"${salario_mediano:,.0f}",
-        help="Valor mediano dos salários"
+        help="Valor mediano dos salários (o menor dos dois centrais, sem interpolação; aproximado pelos esboços de quantis sem filtro de salário)"
     )
 
 with col3:
@@ -514,239 +672,328 @@ with col5:
         help="Cargo mais frequente nos dados"
     )
 
+# Percentis: mescla dos esboços do cubo (aproximados) ou cálculo exato nas linhas
+percentis = resultado.percentis
+nota_percentis = (
+    f" · aproximados (erro relativo ≤ {ERRO_RELATIVO:.0%})" if resultado.quantis_aproximados else ""
+)
+st.caption(
+    f"📐 Percentis salariais — P25: ${percentis[25]:,.0f} · P75: ${percentis[75]:,.0f} · "
+    f"P90: ${percentis[90]:,.0f}{nota_percentis}"
+)
+
 st.markdown("---")
 
 # --- Análises Visuais com Plotly ---
 st.subheader("📈 Visualizações Interativas")
 
-# Abas para organizar melhor os gráficos
-tab1, tab2, tab3 = st.tabs(["💼 Cargos e Salários", "🌍 Análise Geográfica", "📊 Distribuições"])
+# Seções de gráficos registradas: só a seção exibida monta (e envia) suas figuras
+SECOES_GRAFICOS = {}
 
-with tab1:
+def secao(titulo):
+    """Registra uma função que desenha uma seção de gráficos"""
+    def registrar(funcao):
+        SECOES_GRAFICOS[titulo] = funcao
+        return funcao
+    return registrar
+
+@secao("💼 Cargos e Salários")
+def secao_cargos_salarios(resultado):
+    """Top cargos, salário por senioridade e evolução anual"""
     col_graf1, col_graf2 = st.columns(2)
     
     with col_graf1:
         st.markdown("#### Top 10 Cargos por Salário Médio")
-        top_cargos = df_filtrado.groupby('cargo')['usd'].mean().nlargest(10).sort_values(ascending=True).reset_index()
-        
-        grafico_cargos = px.bar(
-            top_cargos,
-            x='usd',
-            y='cargo',
-            orientation='h',
-            labels={'usd': 'Salário Médio Anual (USD)', 'cargo': 'Cargo'},
-            color='usd',
-            color_continuous_scale='Blues'
-        )
-        grafico_cargos.update_layout(
-            showlegend=False,
-            yaxis={'categoryorder':'total ascending'},
-            height=400,
-            hovermode='closest'
-        )
-        grafico_cargos.update_traces(
-            hovertemplate='<b>%{y}</b><br>Salário: $%{x:,.0f}<extra></extra>'
-        )
+        grafico_cargos = figuras.figura(graficos.figura_top_cargos, resultado.top_cargos, medicao=medicao)
         st.plotly_chart(grafico_cargos, use_container_width=True)
     
     with col_graf2:
         st.markdown("#### Salário Médio por Senioridade")
-        salario_senioridade = df_filtrado.groupby('senioridade')['usd'].mean().reset_index()
-        
-        grafico_senioridade = px.bar(
-            salario_senioridade,
-            x='senioridade',
-            y='usd',
-            labels={'usd': 'Salário Médio (USD)', 'senioridade': 'Nível'},
-            color='usd',
-            color_continuous_scale='Greens'
-        )
-        grafico_senioridade.update_layout(
-            showlegend=False,
-            height=400
-        )
-        grafico_senioridade.update_traces(
-            hovertemplate='<b>%{x}</b><br>Salário: $%{y:,.0f}<extra></extra>'
-        )
+        grafico_senioridade = figuras.figura(graficos.figura_media_senioridade, resultado.media_por_senioridade, medicao=medicao)
         st.plotly_chart(grafico_senioridade, use_container_width=True)
     
     # Gráfico de linha: Evolução salarial ao longo dos anos
     st.markdown("#### Evolução Salarial por Ano")
-    evolucao_ano = df_filtrado.groupby('ano')['usd'].mean().reset_index()
-    
-    grafico_evolucao = px.line(
-        evolucao_ano,
-        x='ano',
-        y='usd',
-        markers=True,
-        labels={'usd': 'Salário Médio (USD)', 'ano': 'Ano'}
-    )
-    grafico_evolucao.update_traces(
-        line_color='#1f77b4',
-        line_width=3,
-        marker=dict(size=10),
-        hovertemplate='<b>Ano %{x}</b><br>Salário: $%{y:,.0f}<extra></extra>'
-    )
-    grafico_evolucao.update_layout(height=350)
+    evolucao_ano = resultado.evolucao_anual()
+    grafico_evolucao = figuras.figura(graficos.figura_evolucao_ano, evolucao_ano, medicao=medicao)
     st.plotly_chart(grafico_evolucao, use_container_width=True)
 
-with tab2:
+@secao("🌍 Análise Geográfica")
+def secao_geografica(resultado):
+    """Mapa de salários por país e top países"""
     col_geo1, col_geo2 = st.columns(2)
     
     with col_geo1:
-        st.markdown("#### Mapa: Salário Médio de Data Scientist por País")
-        df_ds = df_filtrado[df_filtrado['cargo'] == 'Data Scientist']
-        
-        if not df_ds.empty:
-            media_ds_pais = df_ds.groupby('residencia_iso3')['usd'].mean().reset_index()
-            
-            grafico_paises = px.choropleth(
-                media_ds_pais,
-                locations='residencia_iso3',
-                color='usd',
-                color_continuous_scale='RdYlGn',
-                labels={'usd': 'Salário Médio (USD)', 'residencia_iso3': 'País'},
-                hover_data={'usd': ':,.0f'}
-            )
-            grafico_paises.update_layout(
-                height=500,
-                geo=dict(showframe=False, showcoastlines=True)
-            )
+        cargos_disponiveis = conjunto.cargos()
+        cargo_mapa = st.selectbox(
+            "Cargo exibido no mapa:",
+            cargos_disponiveis,
+            index=cargos_disponiveis.index(CARGO_MAPA) if CARGO_MAPA in cargos_disponiveis else 0,
+            key="cargo_mapa"
+        )
+        st.markdown(f"#### Mapa: Salário Médio de {cargo_mapa} por País")
+        media_cargo_pais = conjunto.consultar_mapa(cargo_mapa, selecoes, faixa_salario)
+        if not media_cargo_pais.empty:
+            grafico_paises = figuras.figura(graficos.figura_mapa_paises, media_cargo_pais, medicao=medicao)
             st.plotly_chart(grafico_paises, use_container_width=True)
         else:
-            st.warning("⚠️ Nenhum dado de Data Scientist disponível com os filtros atuais.")
+            st.warning(f"⚠️ Nenhum dado de {cargo_mapa} disponível com os filtros atuais.")
     
     with col_geo2:
         st.markdown("#### Top 10 Países por Salário Médio")
-        top_paises = df_filtrado.groupby('residencia_iso3')['usd'].mean().nlargest(10).sort_values(ascending=True).reset_index()
-        
-        grafico_top_paises = px.bar(
-            top_paises,
-            x='usd',
-            y='residencia_iso3',
-            orientation='h',
-            labels={'usd': 'Salário Médio (USD)', 'residencia_iso3': 'País'},
-            color='usd',
-            color_continuous_scale='Viridis'
-        )
-        grafico_top_paises.update_layout(
-            showlegend=False,
-            height=500
-        )
-        grafico_top_paises.update_traces(
-            hovertemplate='<b>%{y}</b><br>Salário: $%{x:,.0f}<extra></extra>'
-        )
+        grafico_top_paises = figuras.figura(graficos.figura_top_paises, resultado.top_paises, medicao=medicao)
         st.plotly_chart(grafico_top_paises, use_container_width=True)
 
-with tab3:
+@secao("📊 Distribuições")
+def secao_distribuicoes(resultado):
+    """Histograma de salários, tipos de trabalho e tamanho de empresa"""
     col_dist1, col_dist2 = st.columns(2)
     
     with col_dist1:
         st.markdown("#### Distribuição de Salários")
-        grafico_hist = px.histogram(
-            df_filtrado,
-            x='usd',
-            nbins=30,
-            labels={'usd': 'Salário Anual (USD)', 'count': 'Frequência'},
-            color_discrete_sequence=['#1f77b4']
-        )
-        grafico_hist.update_layout(
-            showlegend=False,
-            height=400
-        )
-        grafico_hist.update_traces(
-            hovertemplate='Faixa: $%{x:,.0f}<br>Quantidade: %{y}<extra></extra>'
-        )
+        # Faixas contadas no servidor: a figura leva só as barras, não as linhas
+        grafico_hist = figuras.figura(graficos.figura_histograma, resultado.histograma, medicao=medicao)
         st.plotly_chart(grafico_hist, use_container_width=True)
     
     with col_dist2:
         st.markdown("#### Proporção dos Tipos de Trabalho")
-        remoto_contagem = df_filtrado['remoto'].value_counts().reset_index()
-        remoto_contagem.columns = ['tipo_trabalho', 'quantidade']
-        
-        grafico_remoto = px.pie(
-            remoto_contagem,
-            names='tipo_trabalho',
-            values='quantidade',
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        grafico_remoto.update_traces(
-            textposition='inside',
-            textinfo='percent+label',
-            hovertemplate='<b>%{label}</b><br>Quantidade: %{value}<br>Percentual: %{percent}<extra></extra>'
-        )
-        grafico_remoto.update_layout(height=400)
+        grafico_remoto = figuras.figura(graficos.figura_tipos_trabalho, resultado.contagem_remoto, medicao=medicao)
         st.plotly_chart(grafico_remoto, use_container_width=True)
     
     # Gráfico adicional: Tamanho da empresa
     st.markdown("#### Distribuição por Tamanho de Empresa")
-    tamanho_empresa = df_filtrado['tamanho_empresa'].value_counts().reset_index()
-    tamanho_empresa.columns = ['tamanho', 'quantidade']
-    
-    grafico_tamanho = px.bar(
-        tamanho_empresa,
-        x='tamanho',
-        y='quantidade',
-        labels={'tamanho': 'Tamanho da Empresa', 'quantidade': 'Número de Registros'},
-        color='quantidade',
-        color_continuous_scale='Blues'
-    )
-    grafico_tamanho.update_layout(showlegend=False, height=350)
+    grafico_tamanho = figuras.figura(graficos.figura_tamanho_empresa, resultado.contagem_tamanho, medicao=medicao)
     st.plotly_chart(grafico_tamanho, use_container_width=True)
 
+# KPIs da comparação: rótulo, campo do resultado e se o delta é relativo (%)
+KPIS_COMPARACAO = [
+    ("👥 Registros", "total_registros", False),
+    ("💰 Salário Médio", "salario_medio", True),
+    ("📊 Salário Mediano", "salario_mediano", True),
+]
+
+def formatar_kpi(campo, valor):
+    if pd.isna(valor):
+        return "—"
+    return f"{valor:,.0f}" if campo == "total_registros" else f"${valor:,.0f}"
+
+@secao("🆚 Comparar Segmentos")
+@st.fragment
+def secao_comparacao(resultado):
+    """Segmento A (barra lateral) contra um segmento B editado aqui, lado a lado
+
+    Fragmento: mudar o segmento B reexecuta só esta seção. O lado que não
+    mudou sai do cache do conjunto; os que faltam partem da mesma base comum.
+    """
+    st.caption("**Segmento A:** filtros da barra lateral · **Segmento B:** defina abaixo (começa igual ao A)")
+    salario_min, salario_max = conjunto.limites_salario()
+    segmento_a = {
+        "comparacao_anos": anos_selecionados,
+        "comparacao_senioridades": senioridades_selecionadas,
+        "comparacao_contratos": contratos_selecionados,
+        "comparacao_tamanhos": tamanhos_selecionados,
+        "comparacao_faixa": (max(faixa_salario[0], salario_min), min(faixa_salario[1], salario_max)),
+    }
+    # B é semeado com A só uma vez: mudanças posteriores em A não o alteram
+    for chave, valor in segmento_a.items():
+        st.session_state.setdefault(chave, valor)
+
+    def copiar_segmento_a():
+        st.session_state.update(segmento_a)
+
+    st.button("⬇️ Copiar A → B", on_click=copiar_segmento_a, help="Substitui o segmento B pelos filtros atuais da barra lateral")
+
+    col_b1, col_b2, col_b3, col_b4 = st.columns(4)
+    with col_b1:
+        anos_b = st.multiselect("Anos (B)", conjunto.opcoes('ano'), key="comparacao_anos")
+    with col_b2:
+        senioridades_b = st.multiselect("Senioridades (B)", conjunto.opcoes('senioridade'), key="comparacao_senioridades")
+    with col_b3:
+        contratos_b = st.multiselect("Contratos (B)", conjunto.opcoes('contrato'), key="comparacao_contratos")
+    with col_b4:
+        tamanhos_b = st.multiselect("Portes (B)", conjunto.opcoes('tamanho_empresa'), key="comparacao_tamanhos")
+    faixa_b = st.slider(
+        "Faixa salarial (B):",
+        min_value=salario_min,
+        max_value=salario_max,
+        step=10000,
+        format="$%d",
+        key="comparacao_faixa"
+    )
+    selecoes_b = {
+        'ano': anos_b,
+        'senioridade': senioridades_b,
+        'contrato': contratos_b,
+        'tamanho_empresa': tamanhos_b,
+    }
+
+    comparacao = conjunto.comparar((selecoes, faixa_salario), (selecoes_b, faixa_b))
+    if comparacao.b.total_registros == 0:
+        st.warning("⚠️ Nenhum dado corresponde ao segmento B. Ajuste os filtros acima.")
+        return
+
+    # KPIs: valor de cada lado e diferença B − A
+    colunas_kpi = st.columns(len(KPIS_COMPARACAO) + 1)
+    for coluna, (rotulo, campo, relativo) in zip(colunas_kpi, KPIS_COMPARACAO):
+        valor_a, valor_b = getattr(comparacao.a, campo), getattr(comparacao.b, campo)
+        delta = valor_b - valor_a
+        texto_delta = f"{delta:+,.0f}"
+        if relativo and valor_a:
+            texto_delta += f" ({delta / valor_a:+.1%})"
+        with coluna:
+            st.metric(f"{rotulo} (A)", formatar_kpi(campo, valor_a))
+            st.metric(f"{rotulo} (B)", formatar_kpi(campo, valor_b), delta=texto_delta)
+    with colunas_kpi[-1]:
+        st.metric("👨‍💼 Cargo Comum (A)", comparacao.a.cargo_mais_frequente)
+        st.metric("👨‍💼 Cargo Comum (B)", comparacao.b.cargo_mais_frequente)
+    if comparacao.a.quantis_aproximados or comparacao.b.quantis_aproximados:
+        st.caption(f"Medianas aproximadas (erro relativo ≤ {ERRO_RELATIVO:.0%})")
+
+    col_comp1, col_comp2 = st.columns(2)
+    with col_comp1:
+        st.markdown("#### Top 10 Cargos por Salário Médio")
+        grafico_cargos = figuras.figura(graficos.figura_top_cargos_comparacao, comparacao.top_cargos())
+        st.plotly_chart(grafico_cargos, use_container_width=True)
+    with col_comp2:
+        st.markdown("#### Distribuição de Salários")
+        grafico_hist = figuras.figura(graficos.figura_histograma_comparacao, comparacao.histograma)
+        st.plotly_chart(grafico_hist, use_container_width=True)
+
+    st.markdown("#### Evolução Salarial por Ano")
+    grafico_evolucao = figuras.figura(graficos.figura_evolucao_comparacao, comparacao.evolucao_anual())
+    st.plotly_chart(grafico_evolucao, use_container_width=True)
+
+secao_exibida = st.radio(
+    "Seção:",
+    list(SECOES_GRAFICOS),
+    horizontal=True,
+    key="secao_graficos",
+    label_visibility="collapsed"
+)
+medicao.marco("kpis")
+with medicao.etapa(f"secao:{SECOES_GRAFICOS[secao_exibida].__name__}"):
+    SECOES_GRAFICOS[secao_exibida](resultado)
+
 st.markdown("---")
 
 # --- Tabela de Dados Detalhados ---
+def descartar_exportacao():
+    """Libera o arquivo de exportação preparado nesta sessão"""
+    st.session_state.pop('exportacao', None)
+
 st.subheader("📋 Dados Detalhados")
 
 # Opção para mostrar/ocultar a tabela
 mostrar_tabela = st.checkbox("Mostrar tabela de dados completa", value=False)
 
 if mostrar_tabela:
+    # Linhas filtradas: ids via bitmaps e índice ordenado (em memória) ou
+    # filtro e total (arquivos particionados)
+    linhas_filtradas = conjunto.selecionar_linhas(selecoes, faixa_salario)
+    total_linhas = conjunto.total_linhas if linhas_filtradas is None else len(linhas_filtradas)
+    
     # Opções de visualização
-    col_opcoes1, col_opcoes2 = st.columns(2)
+    col_opcoes1, col_opcoes2, col_opcoes3 = st.columns([1, 1, 2])
     
     with col_opcoes1:
         num_linhas = st.selectbox(
-            "Número de linhas para exibir:",
-            [10, 25, 50, 100, "Todos"],
+            "Linhas por página:",
+            [10, 25, 50, 100, 500],
             index=0
         )
     
     with col_opcoes2:
+        ordenar_por = st.selectbox(
+            "Ordenar por:",
+            ["(sem ordenação)"] + conjunto.colunas,
+            index=0
+        )
+        crescente = st.toggle("Ordem crescente", value=True)
+    
+    with col_opcoes3:
         colunas_exibir = st.multiselect(
             "Selecione as colunas:",
-            df_filtrado.columns.tolist(),
-            default=df_filtrado.columns.tolist()
+            conjunto.colunas,
+            default=conjunto.colunas
         )
     
+    # Paginação: só a página visível é serializada para o navegador
+    total_paginas = max((total_linhas + num_linhas - 1) // num_linhas, 1)
+    pagina = st.number_input(
+        f"Página (de {total_paginas:,}):",
+        min_value=1,
+        max_value=total_paginas,
+        value=1,
+        step=1,
+        # A chave muda com o total de páginas para reiniciar na página 1
+        key=f"pagina_tabela_{total_paginas}"
+    )
+    inicio_pagina = (pagina - 1) * num_linhas
+    
+    df_pagina = conjunto.pagina(
+        linhas_filtradas,
+        inicio_pagina,
+        num_linhas,
+        ordenar_por=None if ordenar_por == "(sem ordenação)" else ordenar_por,
+        crescente=crescente
+    )
+    
     # Exibir tabela
-    if num_linhas == "Todos":
-        st.dataframe(
-            df_filtrado[colunas_exibir],
-            use_container_width=True,
-            height=400
-        )
-    else:
-        st.dataframe(
-            df_filtrado[colunas_exibir].head(num_linhas),
-            use_container_width=True,
-            height=400
+    st.dataframe(
+        df_pagina[colunas_exibir],
+        use_container_width=True,
+        height=400
+    )
+    st.caption(
+        f"Exibindo linhas {inicio_pagina + 1:,}–{inicio_pagina + len(df_pagina):,} "
+        f"de {total_linhas:,}"
+    )
+    
+    # Exportação sob demanda: o arquivo só é gerado (em blocos) ao clicar
+    col_export1, col_export2 = st.columns([1, 2])
+    
+    with col_export1:
+        formato_exportacao = st.radio(
+            "Formato:",
+            list(exportacao.FORMATOS),
+            horizontal=True,
+            key="formato_exportacao"
         )
     
-    # Botão de download
-    csv = df_filtrado.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download dos dados filtrados (CSV)",
-        data=csv,
-        file_name='dados_salarios_filtrados.csv',
-        mime='text/csv',
-        use_container_width=True
-    )
+    chave_exportacao = (conjunto.versao, conjunto.assinatura(selecoes, faixa_salario), formato_exportacao)
+    exportacao_pronta = st.session_state.get('exportacao')
+    if exportacao_pronta is not None and exportacao_pronta['chave'] != chave_exportacao:
+        # Filtros ou formato mudaram: o arquivo preparado não vale mais
+        descartar_exportacao()
+        exportacao_pronta = None
+    
+    with col_export2:
+        if exportacao_pronta is None:
+            if st.button("⚙️ Preparar download dos dados filtrados", use_container_width=True):
+                with st.spinner('📦 Gerando arquivo...'):
+                    # Gerado em blocos no disco e lido uma única vez; o arquivo
+                    # temporário é apagado na hora
+                    conteudo = exportacao.consumir(conjunto.exportar(formato_exportacao, linhas_filtradas))
+                st.session_state['exportacao'] = {'chave': chave_exportacao, 'conteudo': conteudo}
+                st.rerun()
+        else:
+            extensao = exportacao.FORMATOS[formato_exportacao]['extensao']
+            # Depois do clique o conteúdo sai da sessão (o Streamlit ainda o
+            # serve por um ciclo de limpeza, o suficiente para o download)
+            st.download_button(
+                label=f"📥 Download dos dados filtrados ({formato_exportacao})",
+                data=exportacao_pronta['conteudo'],
+                file_name=f'dados_salarios_filtrados.{extensao}',
+                mime=exportacao.FORMATOS[formato_exportacao]['mime'],
+                on_click=descartar_exportacao,
+                use_container_width=True
+            )
 else:
+    descartar_exportacao()
     st.info("👆 Marque a caixa acima para visualizar a tabela de dados completa")
 
+medicao.marco("tabela")
+
 # --- Footer ---
 st.markdown("---")
 col_footer1, col_footer2, col_footer3 = st.columns(3)
@@ -759,3 +1006,15 @@ with col_footer2:
 
 with col_footer3:
     st.caption("🔍 Use os filtros para análises personalizadas")
+
+# --- Instrumentação do rerun ---
+instrumentacao.registrar(medicao, versao=conjunto.versao, linhas=resultado.total_registros)
+if medicao.habilitada:
+    with painel_depuracao.container():
+        with st.expander("🐞 Depuração do Rerun", expanded=False):
+            st.caption(f"⏱️ Rerun em {medicao.total_segundos() * 1000:,.0f} ms")
+            st.dataframe(
+                pd.DataFrame(medicao.etapas).assign(ms=lambda etapas: etapas['segundos'] * 1000).drop(columns='segundos'),
+                use_container_width=True,
+                hide_index=True
+            )